@@ -15,7 +15,7 @@ import traceback
 import sys
 
 from errors import *
-from common import ErrorEmbed, MyEmbed
+from common import ErrorEmbed, MyEmbed, all_stats
 from constants import LOG_CHANNEL_ID
 
 from .errors import *
@@ -215,6 +215,25 @@ class Admin(commands.Cog, name='Admin', command_attrs=dict(hidden=True)):
         ).send(ctx, target=ctx.author)
 
 
+    @commands.command(
+        name='stats',
+        aliases=['metrics'],
+        description='Show internal counters',
+        brief = '内部の統計情報を表示',
+        usage = '!stats',
+        hidden = True
+    )
+    @commands.is_owner()
+    async def stats(self, ctx: commands.Context) -> None:
+        e = MyEmbed(title='Stats')
+
+        for name, counters in all_stats().items():
+            lines = '\n'.join(f'{k}: {v:.3f}' if isinstance(v, float) else f'{k}: {v}' for k, v in counters.items())
+            e.add_field(name=name, value=f'```{lines or "-"}```', inline=False)
+
+        await ctx.author.send(embed=e)
+
+
     @commands.Cog.listener('on_ready')
     async def on_ready(self) -> None:
         self.LOG_CHANNEL: TextChannel = self.bot.get_channel(LOG_CHANNEL_ID)
@@ -0,0 +1,191 @@
+"""Latency and memory of the Pillow chart renderer against the matplotlib one.
+
+The previous matplotlib implementations of the sokuji difference graph and
+the ``!graph`` win/lose history are kept below. Each implementation runs in
+its own interpreter, so its peak RSS and growth over a process that has
+already imported discord, numpy and Pillow are reported separately.
+
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.charts [--runs 50] [--results 500]
+
+Run from a directory holding ``fonts/``, like the bot itself.
+"""
+from __future__ import annotations
+from typing import Callable
+from io import BytesIO
+from itertools import accumulate
+import argparse
+import json
+import random
+import resource
+import subprocess
+import sys
+import time
+
+
+IMPLEMENTATIONS = ('matplotlib', 'pillow')
+
+
+def ticks(diffs: list[int]) -> tuple[list[int], list[int]]:
+    """Cumulative history and y ticks, as ``sokuji.plotting.graph`` computes them."""
+    history = list(accumulate(diffs))[-13:]
+    min_diff, max_diff = min(history), max(history)
+
+    if min_diff < 0 and max_diff > 0 and max(max_diff, -min_diff) // min(max_diff, -min_diff) < 3:
+        return history, [min_diff, 0, max_diff]
+
+    return history, [min_diff, (min_diff+max_diff)//2, max_diff]
+
+
+def legacy_graph(diffs: list[int]) -> bytes:
+    from matplotlib.figure import Figure
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+    diff_history, y = ticks(diffs)
+    min_diff, max_diff = y[0], y[-1]
+    fig = Figure(figsize=(12.8, 3))
+    FigureCanvasAgg(fig)
+    fig.subplots_adjust(0.125, 0.1, 0.9, 0.85)
+    ax = fig.add_subplot(111, xmargin=0, xticks=[], yticks=y)
+    ax.tick_params(labelsize = 20)
+    ax.grid(axis='y', color='#fffafa')
+    ax.axhspan(min_diff, max_diff, color='grey', alpha=0.3)
+    if min_diff <= 0 and max_diff >= 0:
+        ax.plot([0]*len(diff_history), color='#fffafa')
+    ax.plot(diff_history, color='#6495ed', linewidth=4)
+    for side in ('top', 'right', 'bottom', 'left'):
+        ax.spines[side].set_visible(False)
+    ax.tick_params(axis='y', colors='#fffafa')
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', transparent=True)
+    return buffer.getvalue()
+
+
+def legacy_result_graph(history: list[int]) -> bytes:
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import numpy as np
+
+    xs = np.arange(len(history))
+    lines = plt.plot(history, label='Wins - Loses')
+    plt.setp(lines, color='green', linewidth=1.0)
+    _, _, ymin, ymax = plt.axis()
+    plt.grid(visible=True, which='both', axis='both', color='gray', linestyle=':')
+    plt.legend(bbox_to_anchor=(0, 1), loc='upper left', borderaxespad=0.5)
+    plt.fill_between(xs, ymin, 0, facecolor = '#87ceeb', alpha=0.3)
+    plt.fill_between(xs, 0, ymax, facecolor = '#ffa07a', alpha=0.3)
+    plt.title('Win&Lose History')
+    buffer = BytesIO()
+    plt.savefig(buffer, format='png', bbox_inches='tight')
+    plt.clf()
+    plt.close()
+    return buffer.getvalue()
+
+
+def pillow_graph(diffs: list[int]) -> bytes:
+    # common.charts directly, so the worker does not import discord with sokuji.
+    from common import charts
+    return charts.to_png(charts.diff_chart(*ticks(diffs)))
+
+
+def pillow_result_graph(history: list[int]) -> bytes:
+    from common import charts
+    return charts.to_png(charts.win_lose_chart(history))
+
+
+def inputs(runs: int, results: int) -> tuple[list[list[int]], list[list[int]]]:
+    rng = random.Random(0)
+    diffs = [[rng.randrange(-40, 41, 2) for _ in range(12)] for _ in range(runs)]
+    histories = []
+
+    for _ in range(runs):
+        history, total = [], 0
+
+        for _ in range(results):
+            total += rng.choice((-1, 0, 1))
+            history.append(total)
+
+        histories.append(history)
+
+    return diffs, histories
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered)-1)]
+
+
+def measure(func: Callable[[list[int]], bytes], cases: list[list[int]]) -> dict[str, float]:
+    start = time.perf_counter()
+    size = len(func(cases[0]))
+    first = time.perf_counter() - start
+    samples = []
+
+    for case in cases:
+        start = time.perf_counter()
+        func(case)
+        samples.append(time.perf_counter() - start)
+
+    return {
+        'first_ms': round(first*1000, 2),
+        'p50_ms': round(percentile(samples, 0.5)*1000, 2),
+        'p95_ms': round(percentile(samples, 0.95)*1000, 2),
+        'png_bytes': size,
+    }
+
+
+def worker(name: str, runs: int, results: int) -> dict:
+    # Loaded by the bot anyway; growth past this is the chart stack itself.
+    import discord, numpy, PIL.Image
+
+    diffs, histories = inputs(runs, results)
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    if name == 'matplotlib':
+        graph, result_graph = legacy_graph, legacy_result_graph
+    else:
+        graph, result_graph = pillow_graph, pillow_result_graph
+
+    report = {
+        'diff_graph': measure(graph, diffs),
+        'win_lose_graph': measure(result_graph, histories),
+    }
+    # ru_maxrss is in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    report['peak_rss_mb'] = round(peak / 1024, 1)
+    report['rss_growth_mb'] = round((peak-rss) / 1024, 1)
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=50)
+    parser.add_argument('--results', type=int, default=500, help='wars in each win/lose history')
+    parser.add_argument('--worker', choices=IMPLEMENTATIONS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.runs, args.results)))
+        return
+
+    report = {'runs': args.runs, 'results': args.results}
+
+    for name in IMPLEMENTATIONS:
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.charts', '--worker', name,
+             '--runs', str(args.runs), '--results', str(args.results)],
+            capture_output=True, text=True, check=True
+        )
+        report[name] = json.loads(out.stdout)
+
+    for chart in ('diff_graph', 'win_lose_graph'):
+        report[f'{chart}_speedup'] = round(
+            report['matplotlib'][chart]['p50_ms'] / report['pillow'][chart]['p50_ms'], 2
+        )
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+"""Conformance check and throughput benchmark for ``Rank.from_text``.
+
+Every string over the rank shorthand alphabet up to ``--length`` characters
+is parsed by both the table-driven parser and the previous ``startswith``
+chain kept below, results are compared, and parses per second are reported.
+
+    python -m benchmarks.rank_parser [--length 5]
+"""
+from __future__ import annotations
+from typing import Optional, Union
+from itertools import product
+import argparse
+import json
+import time
+
+from sokuji.errors import InvalidRankInput
+from objects.rank import Rank
+
+
+ALPHABET = '0123456789+-'
+
+
+def legacy_from_text(text: str) -> Optional[list[int]]:
+    if ' ' in text:
+        return None
+    data: list[int] = []
+    prev: Optional[int] = None
+    next_list: list[int] = []
+    loopFlag: bool = False
+    while text:
+        next_list = []
+        if text.startswith('-'):
+            loopFlag = True
+            text = text[1:]
+            if data:
+                prev = data[-1]
+            else:
+                prev = 0
+        if text.startswith('0'):
+            next_list = [10]
+            text = text[1:]
+        elif text.startswith('+'):
+            next_list = [11]
+            text = text[1:]
+        elif text.startswith('10'):
+            next_list = [10]
+            text = text[2:]
+        elif text.startswith('110'):
+            next_list = [1, 10]
+            text = text[3:]
+        elif text.startswith('1112'):
+            next_list = [11, 12]
+            text = text[4:]
+        elif text.startswith('111'):
+            next_list = [1, 11]
+            text = text[3:]
+        elif text.startswith('112'):
+            next_list = [1, 12]
+            text = text[3:]
+        elif text.startswith('11'):
+            next_list = [11]
+            text = text[2:]
+        elif text.startswith('12'):
+            if data:
+                next_list = [12]
+            else:
+                next_list = [1, 2]
+            text = text[2:]
+        elif text:
+            try:
+                next_list = [int(text[0], 16)]
+                text = text[1:]
+            except ValueError:
+                raise InvalidRankInput
+
+        if loopFlag:
+            if not next_list:
+                next_list = [12]
+            next = next_list[0]
+            while next - prev > 1:
+                data.append(prev+1)
+                prev += 1
+            loopFlag = False
+        data += next_list
+    return [r for r in sorted(set(data)) if 0 < r < 13]
+
+
+def parse(text: str) -> Union[list[int], str]:
+    try:
+        return Rank.from_text(text).data
+    except InvalidRankInput:
+        return 'invalid'
+
+
+def legacy_parse(text: str) -> Union[list[int], str]:
+    try:
+        return legacy_from_text(text)
+    except InvalidRankInput:
+        return 'invalid'
+
+
+def corpus(length: int) -> list[str]:
+    return [''.join(p) for n in range(1, length+1) for p in product(ALPHABET, repeat=n)]
+
+
+def throughput(func, texts: list[str]) -> float:
+    start = time.perf_counter()
+
+    for text in texts:
+        func(text)
+
+    return len(texts) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--length', type=int, default=5)
+    args = parser.parse_args()
+    texts = corpus(args.length)
+    mismatches = [t for t in texts if parse(t) != legacy_parse(t)]
+    result = {
+        'inputs': len(texts),
+        'mismatches': len(mismatches),
+        'examples': mismatches[:10],
+        'table_parses_per_sec': round(throughput(parse, texts)),
+        'legacy_parses_per_sec': round(throughput(legacy_parse, texts)),
+    }
+    result['speedup'] = round(result['table_parses_per_sec'] / result['legacy_parses_per_sec'], 2)
+    print(json.dumps(result, indent=2))
+
+    if mismatches:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
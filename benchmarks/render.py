@@ -0,0 +1,186 @@
+"""Latency, memory and output size of result card and results graph rendering.
+
+Synthetic mogis and war histories are generated from a fixed seed and every
+scenario runs in its own interpreter, so peak RSS belongs to that scenario
+alone. Results are printed as JSON, or written with ``--output`` to compare
+renderer changes.
+
+    python -m benchmarks.render [--runs 30] [--only card] [--output render.json]
+
+Run from a directory holding ``fonts/`` and ``images/`` with the bot's
+environment (``DB_KEY``), like the bot itself.
+"""
+from __future__ import annotations
+from typing import Any, Callable, NamedTuple, Optional
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+
+
+class Scenario(NamedTuple):
+    kind: str
+    description: str
+    options: dict[str, Any]
+
+
+SCENARIOS: dict[str, Scenario] = {
+    'card': Scenario('card', '12 races, no track', {}),
+    'card_track': Scenario('card', '12 races on a track background', {'track': True}),
+    'card_draw': Scenario('card', '12 races ending in a draw', {'draw': True}),
+    'card_sweep': Scenario('card', '12 races of 1-6 sweeps, +480', {'sweep': True}),
+    'card_swing': Scenario('card', 'sweeps for 6 races then swept back', {'swing': True}),
+    'card_prefix': Scenario('card', '12 races finished from a graph drawn at race 11', {'prefix': True}),
+    'results_12': Scenario('results', '12 wars', {'wars': 12}),
+    'results_100': Scenario('results', '100 wars', {'wars': 100}),
+    'results_500': Scenario('results', '500 wars', {'wars': 500}),
+    'results_2000': Scenario('results', '2000 wars', {'wars': 2000}),
+    'results_draws': Scenario('results', '500 drawn wars, a flat line', {'wars': 500, 'draws': True}),
+}
+
+
+def races(rng: random.Random, options: dict[str, Any]) -> list[list[int]]:
+    from objects import Format
+
+    scores = sorted(set(Format.V6.placements.values()))
+    total = sum(Format.V6.points)
+    history: list[list[int]] = []
+
+    for i in range(12):
+        if options.get('sweep') or options.get('swing'):
+            score = scores[-1] if i < 6 or options.get('sweep') else scores[0]
+        elif options.get('draw') and i % 2:
+            score = total - history[-1][0]
+        else:
+            score = rng.choice(scores)
+
+        history.append([score, total-score])
+
+    return history
+
+
+def tracks() -> list[Optional[str]]:
+    from objects import Track
+
+    return [t.nick_en for t in Track if t and os.path.exists(f'images/{t.nick_en}.png')]
+
+
+def card_cases(runs: int, options: dict[str, Any]) -> tuple[Callable[..., bytes], list[tuple]]:
+    from sokuji import plotting
+
+    rng = random.Random(0)
+    names = tracks() if options.get('track') else [None]
+    cases = [(['Team A', 'Team B'], races(rng, options), rng.choice(names)) for _ in range(runs)]
+
+    def make(tags: list[str], history: list[list[int]], track: Optional[str]) -> bytes:
+        return plotting.make(tags, history, track).fp.read()
+
+    if not options.get('prefix'):
+        return make, cases
+
+    prefixes = [plotting.graph_prefix([s[0]-s[1] for s in history[:-1]]) for _, history, _ in cases]
+    return plotting.render, [(*case, prefix) for case, prefix in zip(cases, prefixes)]
+
+
+def results_cases(runs: int, options: dict[str, Any]) -> tuple[Callable[..., bytes], list[tuple]]:
+    from results.plotting import result_graph
+    import pandas as pd
+
+    rng = random.Random(0)
+    cases = []
+
+    for _ in range(runs):
+        scores = [rng.randint(380, 604) for _ in range(options['wars'])]
+        enemy = scores if options.get('draws') else [984-s for s in scores]
+        cases.append((pd.DataFrame({'score': scores, 'enemyScore': enemy}),))
+
+    return lambda df: result_graph(df).getvalue(), cases
+
+
+def percentile(samples: list[float], q: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(int(len(ordered) * q), len(ordered)-1)]
+
+
+def worker(name: str, runs: int) -> dict[str, Any]:
+    # Loaded by the bot anyway; growth past this is the rendering itself.
+    import discord, numpy, pandas, PIL.Image
+
+    scenario = SCENARIOS[name]
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    func, cases = (card_cases if scenario.kind == 'card' else results_cases)(runs, scenario.options)
+    setup = time.perf_counter() - start
+
+    start = time.perf_counter()
+    func(*cases[0])
+    first = time.perf_counter() - start
+    samples, sizes = [], []
+
+    for case in cases:
+        start = time.perf_counter()
+        data = func(*case)
+        samples.append(time.perf_counter() - start)
+        sizes.append(len(data))
+
+    # ru_maxrss is in KiB on Linux.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'description': scenario.description,
+        'runs': len(samples),
+        'setup_ms': round(setup*1000, 2),
+        'first_ms': round(first*1000, 2),
+        'p50_ms': round(percentile(samples, 0.5)*1000, 2),
+        'p95_ms': round(percentile(samples, 0.95)*1000, 2),
+        'max_ms': round(max(samples)*1000, 2),
+        'png_bytes_p50': int(percentile(sizes, 0.5)),
+        'png_bytes_max': max(sizes),
+        'peak_rss_mb': round(peak/1024, 1),
+        'rss_growth_mb': round((peak-base_rss)/1024, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=30)
+    parser.add_argument('--only', default='', help='run scenarios whose name starts with this')
+    parser.add_argument('--output', help='write the report to this file as well')
+    parser.add_argument('--worker', choices=SCENARIOS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args.runs)))
+        return
+
+    report: dict[str, Any] = {'python': sys.version.split()[0], 'runs': args.runs, 'scenarios': {}}
+
+    for name in SCENARIOS:
+        if not name.startswith(args.only):
+            continue
+
+        out = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.render', '--worker', name, '--runs', str(args.runs)],
+            capture_output=True, text=True
+        )
+
+        if out.returncode:
+            report['scenarios'][name] = {'error': out.stderr.strip().splitlines()[-1:]}
+            continue
+
+        report['scenarios'][name] = json.loads(out.stdout.splitlines()[-1])
+
+    text = json.dumps(report, indent=2)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,8 +1,13 @@
+from typing import Optional
 from discord.ext import commands
 import discord
+import asyncio
 import os
 
 from team.components import VoteView
+from common.assets import ASSETS
+from objects.leaderboard import LEADERBOARD
+from objects.lounge import LOUNGE
 
 intents = discord.Intents.default()
 # intents.message_content = True
@@ -29,15 +34,28 @@ class Bot(commands.Bot):
             owner_id = 123456789
         )
         self.persistent_views_added: bool = False
+        self.asset_task: Optional[asyncio.Task] = None
 
 
     async def on_ready(self):
         if not self.persistent_views_added:
             self.add_view(VoteView())
             self.persistent_views_added = True
+        if self.asset_task is None:
+            # Uploading images can take a while; embeds attach files until it is done.
+            self.asset_task = asyncio.create_task(ASSETS.start(self))
+        LEADERBOARD.start()
         print('Bot ready.')
 
 
+    async def close(self) -> None:
+        try:
+            await super().close()
+        finally:
+            LEADERBOARD.stop()
+            await LOUNGE.close()
+
+
 bot = Bot()
 bot.load_extensions(*extensions)
 
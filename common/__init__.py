@@ -1,3 +1,4 @@
 from .components import *
+from .metrics import *
 from .timezones import *
 from .utils import *
\ No newline at end of file
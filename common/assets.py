@@ -0,0 +1,221 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from urllib.parse import parse_qs, urlparse
+from io import BytesIO
+import traceback
+import hashlib
+import asyncio
+import time
+import os
+
+from discord import File, NotFound
+
+from constants import ASSET_CHANNEL_ID
+from .metrics import get_stats
+from .utils import get_asset_manifest, put_asset_manifest
+
+if TYPE_CHECKING:
+    from discord import Client, Message
+
+
+_STATS = get_stats('assets')
+_DIRECTORY = 'images'
+_FILES_PER_MESSAGE = 10
+_BYTES_PER_MESSAGE = 24 << 20
+# Signed URLs expiring within this many seconds are refreshed in the background.
+_REFRESH_MARGIN = 3600
+
+
+def expiry(url: str) -> Optional[int]:
+    """Expiry of a signed Discord CDN URL as a unix time, None if it does not expire."""
+    try:
+        return int(parse_qs(urlparse(url).query)['ex'][0], 16)
+    except (KeyError, IndexError, ValueError):
+        return None
+
+
+class ChannelBackend:
+    """Stores files as attachments of messages in a storage channel."""
+
+    __slots__ = (
+        'client',
+        'channel_id'
+    )
+
+    def __init__(self, client: Client, channel_id: int) -> None:
+        self.client: Client = client
+        self.channel_id: int = channel_id
+
+    async def _channel(self):
+        return self.client.get_channel(self.channel_id) or await self.client.fetch_channel(self.channel_id)
+
+    async def upload(self, files: list[tuple[str, bytes]]) -> tuple[int, list[str]]:
+        channel = await self._channel()
+        message: Message = await channel.send(files=[File(BytesIO(data), filename=name) for name, data in files])
+        return message.id, [a.url for a in message.attachments]
+
+    async def refresh(self, message_id: int) -> list[str]:
+        """Fetching the message again returns freshly signed attachment URLs."""
+        message: Message = await (await self._channel()).fetch_message(message_id)
+        return [a.url for a in message.attachments]
+
+
+class StaticBackend:
+    """Files already served under ``base_url``, by a static host or a local server.
+
+    Nothing is uploaded, which also makes it the stand-in for local testing.
+    """
+
+    __slots__ = (
+        'base_url',
+    )
+
+    def __init__(self, base_url: str) -> None:
+        self.base_url: str = base_url.rstrip('/')
+
+    async def upload(self, files: list[tuple[str, bytes]]) -> tuple[int, list[str]]:
+        return 0, [f'{self.base_url}/{name}' for name, _ in files]
+
+    async def refresh(self, message_id: int) -> list[str]:
+        # Static URLs carry no expiry, so they are never refreshed.
+        return []
+
+
+class AssetPublisher:
+    """Uploads every file in ``images/`` once and hands out their URLs for embeds.
+
+    The manifest maps a file name to its content hash, the storage message and
+    index of its attachment, and the URL. It is persisted, so a restart only
+    uploads files that are new or changed. ``url`` never waits: a URL close to
+    expiry is refreshed in the background, and None means "attach the file".
+    """
+
+    __slots__ = (
+        'backend',
+        'directory',
+        'manifest',
+        '_refreshing'
+    )
+
+    def __init__(self, directory: str = _DIRECTORY) -> None:
+        self.backend: Optional[ChannelBackend | StaticBackend] = None
+        self.directory: str = directory
+        self.manifest: dict[str, dict] = {}
+        self._refreshing: dict[int, asyncio.Task] = {}
+
+    async def start(self, client: Client) -> None:
+        if self.backend is not None:
+            return
+
+        if ASSET_CHANNEL_ID is not None:
+            self.backend = ChannelBackend(client, ASSET_CHANNEL_ID)
+        elif os.environ.get('ASSET_BASE_URL'):
+            self.backend = StaticBackend(os.environ['ASSET_BASE_URL'])
+        else:
+            return
+
+        try:
+            self.manifest = await get_asset_manifest()
+            await self.publish()
+        except Exception:
+            traceback.print_exc()
+
+    async def publish(self) -> int:
+        """Upload files missing from the manifest or changed since. Returns how many were uploaded."""
+        pending: list[tuple[str, bytes, str]] = []
+
+        for name in sorted(os.listdir(self.directory)):
+            with open(os.path.join(self.directory, name), 'rb') as f:
+                data = f.read()
+
+            digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+            entry = self.manifest.get(name)
+
+            if entry is None or entry['sha'] != digest:
+                pending.append((name, data, digest))
+
+        chunks: list[list[tuple[str, bytes, str]]] = []
+
+        for item in pending:
+            if (
+                not chunks
+                or len(chunks[-1]) == _FILES_PER_MESSAGE
+                or sum(len(data) for _, data, _ in chunks[-1]) + len(item[1]) > _BYTES_PER_MESSAGE
+            ):
+                chunks.append([])
+            chunks[-1].append(item)
+
+        for chunk in chunks:
+            message_id, urls = await self.backend.upload([(name, data) for name, data, _ in chunk])
+
+            for index, ((name, data, digest), url) in enumerate(zip(chunk, urls)):
+                self.manifest[name] = {
+                    'sha': digest,
+                    'message': message_id,
+                    'index': index,
+                    'url': url,
+                    'expires': expiry(url)
+                }
+                _STATS.incr('uploaded_bytes', len(data))
+
+            _STATS.incr('uploaded', len(chunk))
+            await put_asset_manifest(self.manifest)
+
+        return len(pending)
+
+    def url(self, name: str) -> Optional[str]:
+        if (entry := self.manifest.get(name)) is None:
+            _STATS.incr('miss')
+            return None
+
+        if entry['expires'] is not None:
+            left = entry['expires'] - time.time()
+
+            if left < _REFRESH_MARGIN:
+                self._refresh(entry['message'])
+
+            if left <= 0:
+                _STATS.incr('expired')
+                return None
+
+        _STATS.incr('hit')
+        return entry['url']
+
+    def _refresh(self, message_id: int) -> None:
+        if message_id not in self._refreshing:
+            self._refreshing[message_id] = asyncio.create_task(self._run_refresh(message_id))
+
+    async def _run_refresh(self, message_id: int) -> None:
+        try:
+            await self._update(message_id)
+        except Exception:
+            traceback.print_exc()
+        finally:
+            del self._refreshing[message_id]
+
+    async def _update(self, message_id: int) -> None:
+        names = [n for n, e in self.manifest.items() if e['message'] == message_id]
+
+        try:
+            urls = await self.backend.refresh(message_id)
+        except NotFound:
+            urls = []
+
+        if len(urls) < len(names):
+            # The storage message is gone, upload its files again.
+            for name in names:
+                del self.manifest[name]
+
+            await self.publish()
+            return
+
+        for name in names:
+            entry = self.manifest[name]
+            entry['url'] = urls[entry['index']]
+            entry['expires'] = expiry(entry['url'])
+
+        _STATS.incr('refreshed')
+        await put_asset_manifest(self.manifest)
+
+
+ASSETS = AssetPublisher()
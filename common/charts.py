@@ -0,0 +1,291 @@
+from __future__ import annotations
+from typing import Optional, Sequence
+from functools import lru_cache
+from io import BytesIO
+from PIL import Image, ImageDraw, ImageFont
+import numpy as np
+
+
+_FONT_PATH = 'fonts/NotoSansCJKjp-Bold.otf'
+_MARGIN = 0.05
+_DOT = 2.65
+
+Color = tuple[int, int, int, int]
+
+
+@lru_cache(maxsize=1)
+def _font_data() -> bytes:
+    with open(_FONT_PATH, 'rb') as f:
+        return f.read()
+
+
+@lru_cache(maxsize=16)
+def font(size: int) -> ImageFont.FreeTypeFont:
+    # Loaded from memory so forked render workers never share a file offset.
+    return ImageFont.truetype(BytesIO(_font_data()), size=size)
+
+
+def rgba(color: str, alpha: float = 1.0) -> Color:
+    color = color.lstrip('#')
+    return int(color[0:2], 16), int(color[2:4], 16), int(color[4:6], 16), round(alpha*255)
+
+
+def margins(lo: float, hi: float, margin: float = _MARGIN) -> tuple[float, float]:
+    if lo == hi:
+        lo, hi = lo-1, hi+1
+
+    pad = (hi-lo) * margin
+    return lo-pad, hi+pad
+
+
+def nice_ticks(lo: float, hi: float, bins: int = 8) -> list[float]:
+    """Round tick values inside [lo, hi], about ``bins`` intervals at most."""
+    raw = (hi-lo) / bins
+    exponent = 10 ** np.floor(np.log10(raw)) if raw > 0 else 1
+
+    for step in (1, 2, 2.5, 5, 10):
+        if step*exponent >= raw:
+            step *= exponent
+            break
+
+    start = np.ceil(lo/step) * step
+    return [float(v) for v in np.arange(start, hi + step*1e-9, step)]
+
+
+def label(value: float) -> str:
+    text = f'{value + 0.0:g}'
+    return text.replace('-', '−')
+
+
+class Axes:
+    """Plot area of a chart, mapping data to pixels.
+
+    Shapes are drawn straight onto the final image in call order. Strokes are
+    antialiased from the distance of each pixel centre to the line, computed
+    only inside the bounding box of every segment.
+    """
+
+    __slots__ = (
+        'box',
+        'xlim',
+        'ylim',
+        'image'
+    )
+
+    def __init__(
+        self,
+        size: tuple[int, int],
+        box: tuple[int, int, int, int],
+        xlim: tuple[float, float],
+        ylim: tuple[float, float],
+        background: Color = (0, 0, 0, 0)
+    ) -> None:
+        self.box: tuple[int, int, int, int] = box
+        self.xlim: tuple[float, float] = xlim
+        self.ylim: tuple[float, float] = ylim
+        self.image: Image.Image = Image.new('RGBA', size, background)
+
+    def x(self, xs: Sequence[float]) -> np.ndarray:
+        left, _, right, _ = self.box
+        x0, x1 = self.xlim
+        return left + (np.asarray(xs, dtype=float)-x0) / (x1-x0) * (right-left)
+
+    def y(self, ys: Sequence[float]) -> np.ndarray:
+        _, top, _, bottom = self.box
+        y0, y1 = self.ylim
+        return bottom - (np.asarray(ys, dtype=float)-y0) / (y1-y0) * (bottom-top)
+
+    def rect(self, x0: float, x1: float, y0: float, y1: float, fill: Color) -> None:
+        """Data-space rectangle, alpha-blended over what is already drawn."""
+        xs = np.clip(np.round(self.x([x0, x1])), 0, self.image.width).astype(int)
+        ys = np.clip(np.round(self.y([y0, y1])), 0, self.image.height).astype(int)
+        width, height = int(xs.max()-xs.min()), int(ys.max()-ys.min())
+
+        if width and height:
+            self.image.alpha_composite(Image.new('RGBA', (width, height), fill), (int(xs.min()), int(ys.min())))
+
+    def hspan(self, y0: float, y1: float, fill: Color) -> None:
+        self.rect(*self.xlim, y0, y1, fill)
+
+    def hline(self, y: float, fill: Color, width: float, dotted: bool = False) -> None:
+        left, _, right, _ = self.box
+        self.stroke([(left, self.y([y])[0]), (right, self.y([y])[0])], fill, width, dotted)
+
+    def vline(self, x: float, fill: Color, width: float, dotted: bool = False) -> None:
+        _, top, _, bottom = self.box
+        self.stroke([(self.x([x])[0], top), (self.x([x])[0], bottom)], fill, width, dotted)
+
+    def line(self, xs: Sequence[float], ys: Sequence[float], fill: Color, width: float) -> None:
+        self.stroke(np.stack([self.x(xs), self.y(ys)], axis=1), fill, width)
+
+    def stroke(
+        self,
+        points: Sequence[tuple[float, float]],
+        fill: Color,
+        width: float,
+        dotted: bool = False
+    ) -> None:
+        """Polyline through pixel positions with round joins, blended once as a whole."""
+        points = np.asarray(points, dtype=float)
+
+        if len(points) < 2:
+            return
+
+        reach = width/2 + 1
+        left, top = np.floor(points.min(axis=0) - reach).astype(int)
+        right, bottom = np.ceil(points.max(axis=0) + reach).astype(int)
+        left, top = max(int(left), 0), max(int(top), 0)
+        right, bottom = min(int(right), self.image.width), min(int(bottom), self.image.height)
+
+        if right <= left or bottom <= top:
+            return
+
+        coverage = np.zeros((bottom-top, right-left), dtype=np.float32)
+
+        for (ax, ay), (bx, by) in zip(points[:-1], points[1:]):
+            x0 = max(int(min(ax, bx) - reach), left)
+            x1 = min(int(max(ax, bx) + reach) + 1, right)
+            y0 = max(int(min(ay, by) - reach), top)
+            y1 = min(int(max(ay, by) + reach) + 1, bottom)
+
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            px = np.arange(x0, x1, dtype=np.float32) + 0.5 - ax
+            py = np.arange(y0, y1, dtype=np.float32)[:, None] + 0.5 - ay
+            dx, dy = bx-ax, by-ay
+            length = float(np.hypot(dx, dy))
+            t = np.clip((px*dx + py*dy) / length**2, 0, 1) if length else np.zeros((1, 1), dtype=np.float32)
+            value = np.clip(width/2 + 0.5 - np.hypot(px - t*dx, py - t*dy), 0, 1)
+
+            if dotted:
+                phase = (t*length) % (width*_DOT)
+                value *= np.clip(np.minimum(phase, width-phase) + 0.5, 0, 1)
+
+            window = coverage[y0-top:y1-top, x0-left:x1-left]
+            np.maximum(window, value, out=window)
+
+        layer = Image.new('RGBA', (right-left, bottom-top), fill[:3] + (0,))
+        layer.putalpha(Image.fromarray(np.round(coverage * fill[3]).astype(np.uint8), 'L'))
+        self.image.alpha_composite(layer, (left, top))
+
+
+@lru_cache(maxsize=256)
+def _text_layer(content: str, fill: Color, size: int, anchor: str) -> tuple[Image.Image, int, int]:
+    # Tick labels repeat from chart to chart, so each one is rasterized once.
+    left, top, right, bottom = ImageDraw.Draw(Image.new('L', (1, 1))).textbbox((0, 0), content, font=font(size), anchor=anchor)
+    left, top = int(left)-1, int(top)-1
+    mask = Image.new('L', (int(right)-left+2, int(bottom)-top+2), 0)
+    ImageDraw.Draw(mask).text((-left, -top), content, fill=fill[3], font=font(size), anchor=anchor)
+    layer = Image.new('RGBA', mask.size, fill[:3] + (0,))
+    layer.putalpha(mask)
+    return layer, left, top
+
+
+def text(
+    image: Image.Image,
+    xy: tuple[float, float],
+    content: str,
+    fill: Color,
+    size: int,
+    anchor: str = 'la'
+) -> None:
+    """Draw text with a straight alpha edge, also on transparent images."""
+    layer, left, top = _text_layer(content, fill, size, anchor)
+    image.alpha_composite(layer, (round(xy[0])+left, round(xy[1])+top))
+
+
+def to_png(image: Image.Image) -> bytes:
+    buffer = BytesIO()
+    image.save(buffer, 'png')
+    return buffer.getvalue()
+
+
+_WHITE = rgba('#fffafa')
+
+
+def _diff_axes(lo: int, hi: int, count: int) -> Axes:
+    return Axes((1280, 300), (160, 45, 1152, 270), (0, max(count-1, 1)), margins(lo, hi))
+
+
+def diff_chart(values: Sequence[int], ticks: Sequence[int], count: Optional[int] = None) -> Image.Image:
+    """Cumulative difference line of the sokuji result card (1280x300, transparent).
+
+    The x axis is laid out for ``count`` values, ``len(values)`` by default.
+    """
+    lo, hi = min(values), max(values)
+    axes = _diff_axes(lo, hi, count or len(values))
+    axes.hspan(lo, hi, rgba('#808080', 0.3))
+
+    for tick in ticks:
+        axes.hline(tick, _WHITE, 1.1)
+
+    if lo <= 0 <= hi:
+        axes.hline(0, _WHITE, 2.1)
+
+    axes.line(range(len(values)), values, rgba('#6495ed'), 5.6)
+    image = axes.image
+    draw = ImageDraw.Draw(image)
+
+    for tick, y in zip(ticks, axes.y(ticks)):
+        draw.line([(155, y), (160, y)], fill=_WHITE, width=1)
+        text(image, (150, y), label(tick), _WHITE, 26, 'rm')
+
+    return image
+
+
+def finish_diff_chart(part: Image.Image, offset: tuple[int, int], values: Sequence[int]) -> Image.Image:
+    """Draw the last segment of ``values`` onto ``part`` of ``diff_chart(values[:-1], ticks, len(values))``.
+
+    ``part`` is a crop of that layer at ``offset``. Only valid while the last
+    value lies within the range of the others, so that both share the same axes.
+    """
+    axes = _diff_axes(min(values), max(values), len(values))
+    axes.image.paste(part, offset)
+    axes.line([len(values)-2, len(values)-1], values[-2:], rgba('#6495ed'), 5.6)
+    return axes.image
+
+
+def win_lose_chart(values: Sequence[int]) -> Image.Image:
+    """Cumulative wins minus loses with the win/lose bands (560x440, white)."""
+    size = (560, 440)
+    box = (52, 34, 548, 408)
+    n = len(values)
+    xlim = margins(0, max(n-1, 0))
+    band = margins(min(values, default=0), max(values, default=0))
+    ylim = margins(min(band[0], 0), max(band[1], 0))
+    axes = Axes(size, box, xlim, ylim, rgba('#ffffff'))
+    axes.rect(0, max(n-1, 0), band[0], 0, rgba('#87ceeb', 0.3))
+    axes.rect(0, max(n-1, 0), 0, band[1], rgba('#ffa07a', 0.3))
+
+    xticks = [t for t in nice_ticks(*xlim) if xlim[0] <= t <= xlim[1]]
+    yticks = [t for t in nice_ticks(*ylim) if ylim[0] <= t <= ylim[1]]
+    grey = rgba('#808080')
+
+    for t in xticks:
+        axes.vline(t, grey, 1.1, dotted=True)
+
+    for t in yticks:
+        axes.hline(t, grey, 1.1, dotted=True)
+
+    axes.line(range(n), values, rgba('#008000'), 1.4)
+    black = rgba('#000000')
+    left, top, right, bottom = box
+    axes.stroke([(left, top), (right, top), (right, bottom), (left, bottom), (left, top)], black, 1.1)
+    image = axes.image
+    draw = ImageDraw.Draw(image)
+
+    for t, x in zip(xticks, axes.x(xticks)):
+        draw.line([(x, bottom), (x, bottom+5)], fill=black, width=1)
+        text(image, (x, bottom+8), label(t), black, 14, 'ma')
+
+    for t, y in zip(yticks, axes.y(yticks)):
+        draw.line([(left-5, y), (left, y)], fill=black, width=1)
+        text(image, (left-8, y), label(t), black, 14, 'rm')
+
+    text(image, ((left+right)/2, top-8), 'Win&Lose History', black, 17, 'md')
+    legend = (left+7, top+7, left+140, top+32)
+    draw.rounded_rectangle(legend, radius=3, fill=(255, 255, 255), outline=(204, 204, 204))
+    draw.line([(legend[0]+8, legend[1]+12), (legend[0]+36, legend[1]+12)], fill=(0, 128, 0), width=1)
+    text(image, (legend[0]+44, legend[1]+12), 'Wins - Loses', black, 14, 'lm')
+    return image
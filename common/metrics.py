@@ -0,0 +1,77 @@
+from __future__ import annotations
+from typing import Union
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+import time
+
+
+Number = Union[int, float]
+_SAMPLES = 256
+
+
+class Stats:
+
+    __slots__ = (
+        'name',
+        'counters',
+        'samples'
+    )
+
+    def __init__(self, name: str) -> None:
+        self.name: str = name
+        self.counters: dict[str, Number] = {}
+        self.samples: dict[str, deque[float]] = {}
+
+    def incr(self, key: str, amount: Number = 1) -> None:
+        self.counters[key] = self.counters.get(key, 0) + amount
+
+    def ratio(self, key: str, other: str) -> float:
+        total = self.counters.get(key, 0) + self.counters.get(other, 0)
+
+        if not total:
+            return 0.0
+
+        return self.counters.get(key, 0) / total
+
+    def observe(self, key: str, value: float) -> None:
+        """Record a sample; only the latest ones are kept for percentiles."""
+        try:
+            self.samples[key].append(value)
+        except KeyError:
+            self.samples[key] = deque((value,), maxlen=_SAMPLES)
+
+    @contextmanager
+    def timer(self, key: str) -> Iterator[None]:
+        start = time.perf_counter()
+
+        try:
+            yield
+        finally:
+            self.observe(key, time.perf_counter()-start)
+
+    def to_dict(self) -> dict[str, Number]:
+        data = self.counters.copy()
+
+        for key, values in self.samples.items():
+            ordered = sorted(values)
+            data[f'{key}_p50'] = ordered[len(ordered)//2]
+            data[f'{key}_p95'] = ordered[min(len(ordered)*95//100, len(ordered)-1)]
+            data[f'{key}_max'] = ordered[-1]
+
+        return data
+
+
+_STATS: dict[str, Stats] = {}
+
+
+def get_stats(name: str) -> Stats:
+    try:
+        return _STATS[name]
+    except KeyError:
+        stats = _STATS[name] = Stats(name)
+        return stats
+
+
+def all_stats() -> dict[str, dict[str, Number]]:
+    return {name: stats.to_dict() for name, stats in sorted(_STATS.items())}
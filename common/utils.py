@@ -182,7 +182,76 @@ def maybe_param(txt: str) -> tuple[Optional[str], Optional[int], Optional[str]]:
     return txt, None, None
 
 
-async def update_sokuji(data: dict, user_ids: set[str]) -> None:
+# Banners of users who stop streaming clear themselves.
+SOKUJI_EXPIRY = 24*3600
+
+
+async def update_sokuji(data: dict, user_ids: set[str]) -> int:
+    """Write the banner payload of each user. Returns the number of requests made."""
+    db = deta.AsyncBase('sokuji')
+    items = [{**data, 'key': user_id} for user_id in sorted(user_ids)]
+    # Deta accepts at most 25 items per put_many.
+    chunks = [items[i:i+25] for i in range(0, len(items), 25)]
+    await asyncio.gather(*[db.put_many(chunk, expire_in=SOKUJI_EXPIRY) for chunk in chunks])
+    await db.close()
+    return len(chunks)
+
+
+async def clear_sokuji(user_ids: set[str]) -> int:
+    """Remove the banner payload of users taken off a banner. Returns the number of requests made."""
     db = deta.AsyncBase('sokuji')
-    await asyncio.gather(*[asyncio.create_task(db.put(data=data, key=user_id)) for user_id in user_ids])
+    await asyncio.gather(*[db.delete(user_id) for user_id in sorted(user_ids)])
+    await db.close()
+    return len(user_ids)
+
+
+# Long enough to resume a finished war the next day.
+MOGI_LOG_EXPIRY = 2*24*3600
+
+
+async def get_mogi_log(mogi_id: str) -> Optional[dict]:
+    """Head record of a mogi's log, with its stored chunks under ``chunks`` (None where missing)."""
+    db = deta.AsyncBase('mogi_log')
+    head: dict = await db.get(key=mogi_id)
+
+    if head is None:
+        await db.close()
+        return None
+
+    data: dict = json.loads(head['data'])
+    chunks = await asyncio.gather(*[db.get(key=f'{mogi_id}:{i}') for i in range(data.get('chunks', 0))])
+    await db.close()
+
+    if 'chunks' in data:
+        data['chunks'] = [json.loads(c['data']) if c is not None else None for c in chunks]
+
+    return data
+
+
+async def put_mogi_log(mogi_id: str, head: dict, chunks: dict[int, dict]) -> None:
+    """Store the head record of a log and the chunks that changed since the last write."""
+    db = deta.AsyncBase('mogi_log')
+    items = [{'key': f'{mogi_id}:{i}', 'data': json.dumps(c, separators=(',', ':'))} for i, c in chunks.items()]
+    items.append({'key': mogi_id, 'data': json.dumps(head, separators=(',', ':'))})
+    # Deta accepts at most 25 items per put_many.
+    await asyncio.gather(*[
+        db.put_many(items[i:i+25], expire_in=MOGI_LOG_EXPIRY) for i in range(0, len(items), 25)
+    ])
+    await db.close()
+
+
+async def get_asset_manifest() -> dict:
+    db = deta.AsyncBase('assets')
+    data: dict = await db.get(key='manifest')
+    await db.close()
+
+    if data is None:
+        return {}
+
+    return json.loads(data['data'])
+
+
+async def put_asset_manifest(manifest: dict) -> None:
+    db = deta.AsyncBase('assets')
+    await db.put(key='manifest', data={'data': json.dumps(manifest, separators=(',', ':'))})
     await db.close()
@@ -3,6 +3,8 @@ BOT_IDS = (123456789)
 MY_ID = 123456789
 LOG_CHANNEL_ID = 1081604309063581816
 SUPPORT_ID = 1071251903649939479
+# Channel holding uploaded static images; None keeps attaching them.
+ASSET_CHANNEL_ID = None
 
 IGNORE_CHANNELS = []
 
@@ -63,6 +63,7 @@ from .response_type import ResponseType
 from .switch_user import MinimalUserPayload ,MinimalUser, SwitchUser
 from errors import MyError
 from common.utils import deta
+from common.assets import ASSETS
 
 
 class APITokenPayload(TypedDict):
@@ -478,8 +479,13 @@ async def send_url(ctx: ApplicationContext) -> None:
     e.description = {
         'ja': f'[こちら]({url})をクリックし、ログインをした後に「この人にする」のリンク先をコピペしてください。'
     }.get(ctx.locale, f'Click [here]({url}) and copy Link address of **select this account** button.')
-    file = File("images/intro.jpg", filename="intro.jpg")
-    e.set_image(url="attachment://intro.jpg")
+    file = None
+
+    if (url := ASSETS.url("intro.jpg")) is not None:
+        e.set_image(url=url)
+    else:
+        file = File("images/intro.jpg", filename="intro.jpg")
+        e.set_image(url="attachment://intro.jpg")
 
     view = BaseView(LoginButton(verifier_b64))
 
@@ -1,3 +1,7 @@
+from .distribution import *
+from .format import *
+from .leaderboard import *
+from .lounge import *
 from .player import *
 from .race import *
 from .rank import *
@@ -0,0 +1,60 @@
+from __future__ import annotations
+from typing import Optional, Union
+
+import numpy as np
+
+
+ArrayLike = Union[float, list[float], np.ndarray]
+
+
+class Distribution:
+    """Sorted MMRs of every ranked player, for leaderboard positions by binary search.
+
+    Queries accept a single value or a whole roster at once. A player's
+    position is one more than the number of players strictly above them, so
+    tied players share it. Missing values (NaN) get position 0.
+    """
+
+    __slots__ = (
+        'values',
+    )
+
+    def __init__(self, values: np.ndarray) -> None:
+        # Placement players are stored as -1.
+        self.values: np.ndarray = np.sort(np.asarray(values)[np.asarray(values) >= 0])
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    def position(self, values: ArrayLike) -> np.ndarray:
+        values = np.asarray(values, dtype=np.float64)
+        positions = len(self.values) - np.searchsorted(self.values, values, side='right') + 1
+        return np.where(np.isnan(values) | (len(self.values) == 0), 0, positions)
+
+    def top(self, values: ArrayLike) -> np.ndarray:
+        """Position of each value as a share of all players, in percent.
+
+        Like the position, it counts the players strictly above and adds one,
+        so the percentage and the ``#position`` of a **Top** line always agree.
+        """
+        if not len(self.values):
+            return np.zeros(np.shape(values))
+
+        return self.position(values) / len(self.values) * 100
+
+    def label(self, value: Optional[float]) -> Optional[str]:
+        """Share and position of a value, as shown after **Top** in embeds."""
+        if value is None or not len(self.values) or np.isnan(value):
+            return None
+
+        return f'{float(self.top(value)):.3g}% (#{int(self.position(value)):,} / {len(self.values):,})'
+
+    def top_line(self, value: Optional[float]) -> str:
+        """**Top** line of an embed description, empty if the value cannot be placed."""
+        label = self.label(value)
+        return f'**Top**  {label}\n' if label is not None else ''
+
+    @staticmethod
+    def with_position(value: float, position: int) -> str:
+        """A player's value followed by their position, for one line of a player list."""
+        return f'{int(value)}, #{position}' if position else f'{int(value)}'
@@ -0,0 +1,70 @@
+from __future__ import annotations
+from typing import Optional
+from enum import Enum
+
+from .rank import Rank, _SCORES, _FULL, _MASK_SCORES
+
+
+class Format(Enum):
+    """War format of a 12 player room, valued by team size."""
+
+    @property
+    def size(self) -> int:
+        return self.value
+
+    @property
+    def teams(self) -> int:
+        return len(_SCORES) // self.value
+
+    @property
+    def label(self) -> str:
+        return f'{self.value}v{self.value}'
+
+    @property
+    def points(self) -> tuple[int, ...]:
+        return _SCORES
+
+    @property
+    def placements(self) -> dict[int, int]:
+        """Score of every valid placement mask of one team."""
+        return _PLACEMENTS[self]
+
+    @property
+    def max_dif(self) -> int:
+        """Largest score difference two teams can make in one race."""
+        return _MAX_DIFS[self]
+
+    def parse(self, text: str) -> list[Rank]:
+        return Rank.get_ranks(text, [], self.size, self.teams)
+
+    def is_valid(self, ranks: list[Rank]) -> bool:
+        filled = 0
+
+        for rank in ranks:
+            if rank.mask not in self.placements or filled & rank.mask:
+                return False
+            filled |= rank.mask
+
+        return len(ranks) == self.teams
+
+    @staticmethod
+    def from_label(label: str) -> Optional[Format]:
+        return _LABELS.get(label.lower())
+
+    def __str__(self) -> str:
+        return self.label
+
+    V2 = 2
+    V3 = 3
+    V4 = 4
+    V6 = 6
+
+
+_PLACEMENTS: dict[Format, dict[int, int]] = {
+    f: {mask: _MASK_SCORES[mask] for mask in range(_FULL+1) if mask.bit_count() == f.size}
+    for f in Format
+}
+_MAX_DIFS: dict[Format, int] = {
+    f: sum(_SCORES[:f.size]) - sum(_SCORES[-f.size:]) for f in Format
+}
+_LABELS: dict[str, Format] = {f.label: f for f in Format}
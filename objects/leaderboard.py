@@ -0,0 +1,259 @@
+from __future__ import annotations
+from typing import Any, Optional
+import traceback
+import asyncio
+import shutil
+import json
+import time
+import os
+
+import numpy as np
+
+from common.metrics import get_stats
+from .distribution import Distribution
+from .lounge import LOUNGE
+
+
+LEADERBOARD_URL = 'https://www.mk8dx-lounge.com/api/player/leaderboard'
+_STATS = get_stats('lounge.leaderboard')
+_PAGE_SIZE = 100
+_INTERVAL = 3600.0
+_RETRY = 300.0
+# Absent values: ids and mmr are never negative, friend codes and discord ids never 0.
+_NONE = -1
+_COLUMNS = ('id', 'mkc_id', 'name', 'country_code', 'discord_id', 'fc', 'mmr', 'max_mmr')
+_CURRENT = 'current.json'
+
+
+def _int(value: Any, default: int = _NONE) -> int:
+    return default if value is None else int(value)
+
+
+def _fc(value: Optional[str]) -> int:
+    try:
+        return int(value.replace('-', ''))
+    except (AttributeError, ValueError):
+        return 0
+
+
+class LeaderboardSnapshot:
+    """Local copy of the whole Lounge leaderboard, refreshed in the background.
+
+    Every attribute is stored as one ``.npy`` column and memory mapped, so a
+    restart reads the last snapshot from disk instead of downloading it again.
+    Each refresh writes a new generation directory and then swaps ``current.json``
+    to point at it, so a crash never leaves columns from two refreshes mixed.
+    Rows are found through indexes by friend code, discord id and name, and a
+    snapshot younger than ``max_age`` answers lookups without the network.
+    ``mmr`` and ``max_mmr`` rank values against every player in it.
+    """
+
+    __slots__ = (
+        'directory',
+        'interval',
+        'max_age',
+        'fetched',
+        'columns',
+        'mmr',
+        'max_mmr',
+        '_fc',
+        '_discord_id',
+        '_name',
+        '_task'
+    )
+
+    def __init__(self, directory: str, interval: float = _INTERVAL, max_age: float = 2*_INTERVAL) -> None:
+        self.directory: str = directory
+        self.interval: float = interval
+        self.max_age: float = max_age
+        self.fetched: float = 0.0
+        self.columns: dict[str, np.ndarray] = {}
+        self.mmr: Distribution = Distribution(np.empty(0))
+        self.max_mmr: Distribution = Distribution(np.empty(0))
+        self._fc: dict[int, int] = {}
+        self._discord_id: dict[int, int] = {}
+        self._name: dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self.columns['id']) if self.columns else 0
+
+    @property
+    def is_fresh(self) -> bool:
+        return bool(self.columns) and time.time() - self.fetched < self.max_age
+
+    def lookup(self, key: str, value: str) -> Optional[dict[str, Any]]:
+        """Player attributes for a ``get_player`` query, None if the snapshot cannot answer it."""
+        if not self.is_fresh:
+            return None
+
+        if key == 'fc':
+            row = self._fc.get(_fc(value))
+        elif key == 'discordId':
+            row = self._discord_id.get(_int(value, 0))
+        elif key == 'name':
+            row = self._name.get(value.lower())
+        else:
+            return None
+
+        if row is None:
+            _STATS.incr('miss')
+            return None
+
+        _STATS.incr('hit')
+        return self.row(row)
+
+    def row(self, index: int) -> dict[str, Any]:
+        c = self.columns
+        fc = int(c['fc'][index])
+        discord_id = int(c['discord_id'][index])
+        # Hidden players are not on the leaderboard, so is_hidden keeps its default.
+        return {
+            'id': int(c['id'][index]),
+            'name': str(c['name'][index]),
+            'mkc_id': int(c['mkc_id'][index]) if c['mkc_id'][index] != _NONE else None,
+            'discord_id': str(discord_id) if discord_id else None,
+            'country_code': str(c['country_code'][index]) or None,
+            'switch_fc': f'{fc//10**8:04d}-{fc//10**4%10**4:04d}-{fc%10**4:04d}' if fc else None,
+            'mmr': int(c['mmr'][index]) if c['mmr'][index] != _NONE else None,
+            'max_mmr': int(c['max_mmr'][index]) if c['max_mmr'][index] != _NONE else None
+        }
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self) -> None:
+        try:
+            self._apply(await asyncio.to_thread(self.load))
+        except Exception:
+            traceback.print_exc()
+
+        while True:
+            if (wait := self.fetched + self.interval - time.time()) > 0:
+                await asyncio.sleep(wait)
+
+            try:
+                await self.refresh()
+            except Exception:
+                traceback.print_exc()
+                _STATS.incr('failed')
+                await asyncio.sleep(_RETRY)
+
+    async def refresh(self) -> None:
+        start = time.perf_counter()
+        first = await self._page(0)
+        pages = await asyncio.gather(*(
+            self._page(skip) for skip in range(_PAGE_SIZE, first['totalPlayers'], _PAGE_SIZE)
+        ))
+        rows = [p for page in (first, *pages) for p in page['data']]
+        self._apply(await asyncio.to_thread(self.save, rows, time.time()))
+        _STATS.observe('refresh', time.perf_counter()-start)
+        _STATS.incr('refreshed')
+
+    @staticmethod
+    async def _page(skip: int) -> dict[str, Any]:
+        if (data := await LOUNGE.get(LEADERBOARD_URL, {'skip': skip, 'pageSize': _PAGE_SIZE})) is None:
+            raise RuntimeError(f'Leaderboard page at {skip} is unavailable.')
+
+        return data
+
+    def save(self, rows: list[dict[str, Any]], fetched: float) -> Optional[tuple]:
+        columns = {
+            'id': np.array([r['id'] for r in rows], dtype=np.int64),
+            'mkc_id': np.array([_int(r.get('mkcId')) for r in rows], dtype=np.int64),
+            'name': np.array([r['name'] for r in rows], dtype=np.str_),
+            'country_code': np.array([r.get('countryCode') or '' for r in rows], dtype=np.str_),
+            'discord_id': np.array([_int(r.get('discordId'), 0) for r in rows], dtype=np.int64),
+            'fc': np.array([_fc(r.get('switchFc')) for r in rows], dtype=np.int64),
+            'mmr': np.array([_int(r.get('mmr')) for r in rows], dtype=np.int32),
+            'max_mmr': np.array([_int(r.get('maxMmr')) for r in rows], dtype=np.int32),
+        }
+        generation = f'gen-{int(fetched*1000)}'
+        path = os.path.join(self.directory, generation)
+        os.makedirs(path, exist_ok=True)
+
+        for name, values in columns.items():
+            with open(os.path.join(path, f'{name}.npy'), 'wb') as f:
+                np.save(f, values)
+                f.flush()
+                os.fsync(f.fileno())
+
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({'fetched': fetched, 'players': len(rows)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        current = os.path.join(self.directory, _CURRENT)
+        previous = self._generation()
+
+        with open(f'{current}.tmp', 'w') as f:
+            json.dump({'generation': generation}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(f'{current}.tmp', current)
+        state = self.load()
+
+        # The previous generation stays mapped by lookups until the new one is swapped in.
+        for name in os.listdir(self.directory):
+            if name.startswith('gen-') and name not in (generation, previous):
+                shutil.rmtree(os.path.join(self.directory, name), ignore_errors=True)
+
+        return state
+
+    def _generation(self) -> Optional[str]:
+        try:
+            with open(os.path.join(self.directory, _CURRENT)) as f:
+                return json.load(f)['generation']
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def load(self) -> Optional[tuple]:
+        """Map the snapshot on disk and index it, None if there is no complete one."""
+        if (generation := self._generation()) is None:
+            return None
+
+        path = os.path.join(self.directory, generation)
+
+        try:
+            with open(os.path.join(path, 'meta.json')) as f:
+                meta = json.load(f)
+
+            columns = {
+                name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')
+                for name in _COLUMNS
+            }
+        except (OSError, ValueError):
+            return None
+
+        if any(len(values) != meta['players'] for values in columns.values()):
+            # Damaged on disk; the next refresh replaces it.
+            return None
+
+        return (
+            meta['fetched'],
+            columns,
+            Distribution(columns['mmr']),
+            Distribution(columns['max_mmr']),
+            {v: i for i, v in enumerate(columns['fc'].tolist()) if v},
+            {v: i for i, v in enumerate(columns['discord_id'].tolist()) if v},
+            {v.lower(): i for i, v in enumerate(columns['name'].tolist())}
+        )
+
+    def _apply(self, state: Optional[tuple]) -> None:
+        # Loaded in a thread and swapped in on the event loop, so lookups never see half of it.
+        if state is None:
+            return
+
+        self.fetched, self.columns, self.mmr, self.max_mmr, self._fc, self._discord_id, self._name = state
+        _STATS.counters['players'] = len(self)
+        _STATS.counters['bytes'] = sum(v.nbytes for v in self.columns.values())
+
+
+LEADERBOARD = LeaderboardSnapshot(os.environ.get('LOUNGE_SNAPSHOT_DIR', 'leaderboard'))
@@ -0,0 +1,92 @@
+from __future__ import annotations
+from typing import Any, Optional
+import asyncio
+import time
+import os
+
+import aiohttp
+
+from common.metrics import get_stats
+
+
+_STATS = get_stats('lounge')
+_LIMIT_PER_HOST = 8
+_KEEPALIVE = 60.0
+_TIMEOUT = 15.0
+
+
+class LoungeClient:
+    """Long-lived HTTP client for the Lounge API.
+
+    One session keeps its connections alive between lookups, so a role-wide
+    lookup reuses a handful of TLS connections instead of opening one per
+    member. At most ``limit_per_host`` requests are in flight; the rest wait
+    for a free slot, which is recorded apart from the request latency.
+    """
+
+    __slots__ = (
+        'limit_per_host',
+        'timeout',
+        '_slots',
+        '_session'
+    )
+
+    def __init__(self, limit_per_host: int = _LIMIT_PER_HOST, timeout: float = _TIMEOUT) -> None:
+        self.limit_per_host: int = limit_per_host
+        self.timeout: float = timeout
+        self._slots: asyncio.Semaphore = asyncio.Semaphore(limit_per_host)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        # Created lazily, a session must belong to the running event loop.
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit_per_host=self.limit_per_host,
+                    keepalive_timeout=_KEEPALIVE,
+                    ttl_dns_cache=300
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+
+    async def get(self, url: str, params: dict[str, Any]) -> Optional[Any]:
+        """|coro|
+
+        JSON body of a GET request, None if the Lounge answered 404.
+
+        Raises
+        ------
+        :class:`aiohttp.ClientResponseError`
+            Any other status, such as a rate limit or a server error.
+        """
+        with _STATS.timer('wait'):
+            await self._slots.acquire()
+
+        start = time.perf_counter()
+
+        try:
+            async with self.session.get(url=url, params=params) as response:
+                _STATS.incr('requests')
+                _STATS.incr(f'status_{response.status}')
+
+                if response.status == 404:
+                    return None
+
+                response.raise_for_status()
+                return await response.json()
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            _STATS.incr('errors')
+            raise
+        finally:
+            self._slots.release()
+            _STATS.observe('latency', time.perf_counter()-start)
+
+    async def close(self) -> None:
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+LOUNGE = LoungeClient(int(os.environ.get('LOUNGE_LIMIT_PER_HOST', _LIMIT_PER_HOST)))
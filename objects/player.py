@@ -1,12 +1,19 @@
 from __future__ import annotations
-from typing import Optional, Union, Type, TypeVar
+from typing import Any, Optional, Union, Type, TypeVar
+from collections import OrderedDict
 from math import isnan
 
+import traceback
 import aiohttp
 import asyncio
+import time
+import sys
 import re
 
 from common import get_lounge_ids
+from common.metrics import get_stats
+from .leaderboard import LEADERBOARD
+from .lounge import LOUNGE
 
 T = TypeVar('T')
 
@@ -15,6 +22,7 @@ MKC_URL = 'https://www.mariokartcentral.com/mkc/registry/users/'
 LOUNGE_WEB = 'https://www.mk8dx-lounge.com/PlayerDetails/'
 API_URL = 'https://www.mk8dx-lounge.com/api/player'
 _RE = re.compile(r'[0-9]{4}\-[0-9]{4}\-[0-9]{4}')
+_STATS = get_stats('lounge.players')
 
 
 class PlayerBase:
@@ -162,6 +170,221 @@ class EmptyPlayer(PlayerBase):
         return False
 
 PlayerLike = Union[Player, EmptyPlayer]
+Key = tuple[str, str]
+
+
+class PlayerCache:
+    """Lounge players indexed by id, reachable through every key they can be looked up by.
+
+    A player fetched by discord id also answers later lookups by name, mkc id
+    or friend code. Entries older than ``ttl`` are still served for up to
+    ``stale`` seconds while a background request refreshes them. Lookups that
+    found nobody are remembered for ``negative_ttl`` seconds.
+
+    Callers get copies, since they set ``linked_id`` on what they receive.
+    """
+
+    __slots__ = (
+        'ttl',
+        'stale',
+        'negative_ttl',
+        'max_entries',
+        'size',
+        '_players',
+        '_keys',
+        '_negative',
+        '_revalidating'
+    )
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        stale: float = 3600.0,
+        negative_ttl: float = 300.0,
+        max_entries: int = 4096
+    ) -> None:
+        self.ttl: float = ttl
+        self.stale: float = stale
+        self.negative_ttl: float = negative_ttl
+        self.max_entries: int = max_entries
+        self.size: int = 0
+        self._players: OrderedDict[int, tuple[Player, float, tuple[Key, ...], int]] = OrderedDict()
+        self._keys: dict[Key, int] = {}
+        self._negative: OrderedDict[Key, float] = OrderedDict()
+        self._revalidating: dict[Key, asyncio.Task] = {}
+
+    @staticmethod
+    def key(params: dict[str, Any]) -> Key:
+        name, value = next(iter(params.items()))
+        return name, str(value).lower() if name == 'name' else str(value)
+
+    @staticmethod
+    def keys(player: Player) -> tuple[Key, ...]:
+        values = (
+            ('name', player.name and player.name.lower()),
+            ('mkcId', player.mkc_id),
+            ('discordId', player.discord_id),
+            ('fc', player.switch_fc)
+        )
+        return tuple((name, str(value)) for name, value in values if value is not None)
+
+    @staticmethod
+    def sizeof(player: Player) -> int:
+        return sys.getsizeof(player) + sum(sys.getsizeof(getattr(player, a)) for a in PlayerBase.__slots__)
+
+    def get(self, key: Key) -> Optional[tuple[PlayerLike, bool]]:
+        """A copy of the cached player and whether it is still fresh, None on a miss.
+
+        A lookup known to find nobody returns a bare :class:`EmptyPlayer`.
+        """
+        now = time.monotonic()
+
+        if (expires := self._negative.get(key)) is not None:
+            if now < expires:
+                self._record('hit')
+                _STATS.incr('negative_hit')
+                return EmptyPlayer(), True
+
+            del self._negative[key]
+
+        if (id := self._keys.get(key)) is not None:
+            player, stored, _, _ = self._players[id]
+            age = now - stored
+
+            if age < self.stale:
+                self._players.move_to_end(id)
+                self._record('hit')
+
+                if age >= self.ttl:
+                    _STATS.incr('stale_hit')
+
+                return Player.from_dict(player.to_dict()), age < self.ttl
+
+            self._remove(id)
+
+        self._record('miss')
+        return None
+
+    @staticmethod
+    def _record(outcome: str) -> None:
+        _STATS.incr(outcome)
+        _STATS.counters['hit_ratio'] = _STATS.ratio('hit', 'miss')
+
+    def put(self, key: Key, player: PlayerLike) -> None:
+        if player.is_empty:
+            # The key no longer leads to the player it did, if any.
+            self._keys.pop(key, None)
+            self._negative[key] = time.monotonic() + self.negative_ttl
+            self._negative.move_to_end(key)
+
+            while len(self._negative) > self.max_entries:
+                self._negative.popitem(last=False)
+        else:
+            if player.id in self._players:
+                self._remove(player.id)
+
+            keys = self.keys(player)
+
+            # A query that resolves to a different spelling is cached as asked, too.
+            if key not in keys:
+                keys += (key,)
+
+            size = self.sizeof(player)
+            self._players[player.id] = Player.from_dict(player.to_dict()), time.monotonic(), keys, size
+            self.size += size
+
+            for k in keys:
+                self._keys[k] = player.id
+                self._negative.pop(k, None)
+
+            while len(self._players) > self.max_entries:
+                self._remove(next(iter(self._players)))
+                _STATS.incr('evicted')
+
+        _STATS.counters['entries'] = len(self._players)
+        _STATS.counters['negative_entries'] = len(self._negative)
+        _STATS.counters['bytes'] = self.size
+
+    def _remove(self, id: int) -> None:
+        _, _, keys, size = self._players.pop(id)
+        self.size -= size
+
+        for k in keys:
+            if self._keys.get(k) == id:
+                del self._keys[k]
+
+    def revalidate(self, key: Key, params: dict[str, Any]) -> None:
+        if key not in self._revalidating:
+            self._revalidating[key] = asyncio.create_task(self._run_revalidate(key, params))
+
+    async def _run_revalidate(self, key: Key, params: dict[str, Any]) -> None:
+        # A failed request leaves the stale entry as it is, to be served until it expires.
+        try:
+            await _shared(params)
+            _STATS.incr('revalidated')
+        except aiohttp.ClientResponseError:
+            _STATS.incr('revalidate_failed')
+        except Exception:
+            traceback.print_exc()
+            _STATS.incr('revalidate_failed')
+        finally:
+            del self._revalidating[key]
+
+
+PLAYERS = PlayerCache()
+
+
+_INFLIGHT: dict[Key, asyncio.Task] = {}
+
+
+async def _request(params: dict[str, Any]) -> PlayerLike:
+    # Only a 404 is an answer worth caching; errors propagate uncached.
+    if (data := await LOUNGE.get(API_URL, params)) is None:
+        player = EmptyPlayer()
+    else:
+        player = Player.loads(data)
+
+    PLAYERS.put(PlayerCache.key(params), player)
+    return player
+
+
+def _done(key: Key, task: asyncio.Task) -> None:
+    if _INFLIGHT.get(key) is task:
+        del _INFLIGHT[key]
+
+    # Retrieved here in case every caller was cancelled.
+    if not task.cancelled():
+        task.exception()
+
+
+def _shared(params: dict[str, Any]) -> asyncio.Task:
+    """Concurrent lookups of the same key share one request to the Lounge API."""
+    key = PlayerCache.key(params)
+
+    if (task := _INFLIGHT.get(key)) is None:
+        task = _INFLIGHT[key] = asyncio.create_task(_request(params))
+        task.add_done_callback(lambda t: _done(key, t))
+        _STATS.incr('upstream')
+    else:
+        _STATS.incr('coalesced')
+
+    return task
+
+
+async def _fetch(params: dict[str, Any], kwargs: dict[str, Any]) -> PlayerLike:
+    try:
+        # Shielded, so a cancelled caller does not cancel the others' request.
+        player = await asyncio.shield(_shared(params))
+    except aiohttp.ClientResponseError:
+        # Rate limits and server errors still read as nobody found, but are not cached.
+        _STATS.incr('failed')
+        return EmptyPlayer(**kwargs)
+
+    if player.is_empty:
+        return EmptyPlayer(**kwargs)
+
+    return Player.from_dict(player.to_dict())
+
 
 async def get_player(**kwargs) -> PlayerLike:
     """|coro|
@@ -195,11 +418,23 @@ async def get_player(**kwargs) -> PlayerLike:
     else:
         return EmptyPlayer(**kwargs)
 
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url=API_URL, params=params) as response:
-            if response.status != 200:
-                return EmptyPlayer(**kwargs)
-            return Player.loads(await response.json())
+    key = PlayerCache.key(params)
+
+    if (cached := PLAYERS.get(key)) is None:
+        if (data := LEADERBOARD.lookup(*key)) is not None:
+            return Player(**data)
+
+        return await _fetch(params, kwargs)
+
+    player, fresh = cached
+
+    if player.is_empty:
+        return EmptyPlayer(**kwargs)
+
+    if not fresh:
+        PLAYERS.revalidate(key, params)
+
+    return player
 
 
 async def get_players_by_ids(discord_ids: list[int]) -> list[PlayerLike]:
@@ -12,6 +12,7 @@ class Race:
 
     __slots__ = (
         '__ranks',
+        '__scores',
         'track'
     )
 
@@ -21,6 +22,7 @@ class Race:
         track: Optional[Track] = None
     ):
         self.__ranks: list[Rank] = ranks
+        self.__scores: tuple[int, ...] = tuple(r.score for r in ranks)
         self.track: Optional[Track] = track
 
     @property
@@ -28,14 +30,15 @@ class Race:
         return self.__ranks
 
     @property
-    def scores(self) -> list[int]:
-        return [r.score for r in self.ranks]
+    def scores(self) -> tuple[int, ...]:
+        return self.__scores
 
-    def is_valid(self) -> bool:
-        return len(self.ranks) == 2
+    def is_valid(self, teams: int = 2) -> bool:
+        return len(self.ranks) == teams
 
     def loads(self, text: str) -> Self:
         self.__ranks = Rank.get_ranks(text, ranks= self.ranks.copy())
+        self.__scores = tuple(r.score for r in self.__ranks)
         return self
 
 
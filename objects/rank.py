@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import Optional, Type, TypeVar
+from typing import NamedTuple, Optional, Type, TypeVar
 from collections.abc import Iterable
 import re
 
@@ -9,130 +9,218 @@ from sokuji.errors import InvalidRankInput
 _SCORES = (15, 12, 10, 9, 8, 7, 6, 5, 4, 3, 2, 1)
 _TRANSLATE_TABLE = dict(zip(map(ord, '１２３４５６７８９０ー＋　'), '1234567890-+ '))
 _RE = re.compile(r'[^0-9\-\ +]')
+_FULL = (1 << len(_SCORES)) - 1
+_TOTAL = sum(_SCORES)
 
 T = TypeVar('T')
 
 
+def _ranks(mask: int) -> list[int]:
+    return [i+1 for i in range(len(_SCORES)) if mask >> i & 1]
+
+
+class Placement(NamedTuple):
+    score: int
+    enemy_score: int
+    dif: int
+    text: str
+
+
+_MASK_SCORES: tuple[int, ...] = tuple(
+    sum(s for i, s in enumerate(_SCORES) if mask >> i & 1) for mask in range(_FULL+1)
+)
+PLACEMENTS: dict[int, Placement] = {
+    mask: Placement(
+        _MASK_SCORES[mask],
+        _TOTAL - _MASK_SCORES[mask],
+        2*_MASK_SCORES[mask] - _TOTAL,
+        ','.join(map(str, _ranks(mask)))
+    )
+    for mask in range(_FULL+1) if mask.bit_count() == 6
+}
+
+
+# Rank shorthand tokens. Longest match wins; each entry is
+# (value when nothing was parsed yet, value after other ranks), where a
+# value is (first rank, last rank, mask).
+_SHORTHAND: dict[str, tuple[tuple[int, ...], tuple[int, ...]]] = {
+    '0': ((10,), (10,)),
+    '+': ((11,), (11,)),
+    '10': ((10,), (10,)),
+    '11': ((11,), (11,)),
+    '12': ((1, 2), (12,)),
+    '110': ((1, 10), (1, 10)),
+    '111': ((1, 11), (1, 11)),
+    '112': ((1, 12), (1, 12)),
+    '1112': ((11, 12), (11, 12)),
+    **{c: ((int(c, 16),), (int(c, 16),)) for c in '123456789abcdefABCDEF'}
+}
+
+
+def _token(values: tuple[int, ...]) -> tuple[int, int, int]:
+    mask = 0
+
+    for v in values:
+        mask |= 1 << (v-1)
+
+    return values[0], values[-1], mask & _FULL
+
+
+def _compile() -> tuple[list[dict[str, int]], list[Optional[tuple[tuple[int, int, int], ...]]]]:
+    transitions: list[dict[str, int]] = [{}]
+    accept: list[Optional[tuple[tuple[int, int, int], ...]]] = [None]
+
+    for word, values in _SHORTHAND.items():
+        state = 0
+
+        for c in word:
+            if c not in transitions[state]:
+                transitions[state][c] = len(transitions)
+                transitions.append({})
+                accept.append(None)
+            state = transitions[state][c]
+
+        accept[state] = tuple(map(_token, values))
+
+    return transitions, accept
+
+
+_TRANSITIONS, _ACCEPT = _compile()
+
+
 class Rank:
+    """Ranks of one team, stored as a 12-bit mask (bit ``r-1`` set for rank ``r``)."""
 
     __slots__ = (
-        '__data'
+        '__mask',
     )
 
-    def __init__(self, data: Iterable[int] = []) -> None:
-        self.__data = list(data)
+    def __init__(self, data: Iterable[int] = ()) -> None:
+        mask = 0
+
+        for r in data:
+            if 0 < r <= len(_SCORES):
+                mask |= 1 << (r-1)
+
+        self.__mask: int = mask
+
+    @classmethod
+    def from_mask(cls: Type[T], mask: int) -> T:
+        rank = cls()
+        rank.__mask = mask & _FULL
+        return rank
 
     def __str__(self) -> str:
-        return ",".join(map(str, sorted(self.__data)))
+        try:
+            return PLACEMENTS[self.__mask].text
+        except KeyError:
+            return ','.join(map(str, self.data))
 
     def __len__(self) -> int:
-        return len(self.data)
+        return self.__mask.bit_count()
+
+    @property
+    def mask(self) -> int:
+        return self.__mask
 
     @property
     def data(self) -> list[int]:
-        return self.__data
+        return _ranks(self.__mask)
 
     @property
     def score(self) -> int:
-        return sum(map(lambda r: _SCORES[r-1], self.data))
+        return _MASK_SCORES[self.__mask]
+
+    def validate(self, ranks: list[Rank], size: int = 6) -> bool:
+        filled = 0
 
-    def validate(self, ranks: list[Rank]) -> bool:
-        filled: set[int] = set()
         for rank in ranks:
-            filled.update(rank.data)
-        for r in filled:
-            if r in self.data:
-                self.__data.remove(r)
-        if len(self) == 6:
-            return True
-        if len(self) > 6:
-            self.__data = self.data[:6]
-            return True
-        unfilled: set[int] = {r for r in range(1, 13)} - filled - set(self.data)
-        if len(unfilled) + len(self) <= 6:
-            self.__data.extend(unfilled)
-        else:
-            while len(self.data) < 6:
-                r: int = max(unfilled)
-                self.__data.append(r)
-                unfilled.remove(r)
-        self.__data.sort()
-        return len(self) == 6
+            filled |= rank.mask
+
+        mask = self.__mask & ~filled
+
+        if mask.bit_count() > size:
+            while mask.bit_count() > size:
+                mask &= ~(1 << (mask.bit_length()-1))
+        elif mask.bit_count() < size:
+            unfilled = _FULL & ~filled & ~mask
+
+            if unfilled.bit_count() + mask.bit_count() <= size:
+                mask |= unfilled
+            else:
+                while mask.bit_count() < size:
+                    top = 1 << (unfilled.bit_length()-1)
+                    mask |= top
+                    unfilled &= ~top
+
+        self.__mask = mask
+        return mask.bit_count() == size
 
     @classmethod
     def from_text(cls: Type[T], text: str) -> Optional[T]:
         if ' ' in text:
             return None
-        data: list[int] = []
-        prev: Optional[int] = None
-        next_list: list[int] = []
-        loopFlag: bool = False
-        while text:
-            next_list = []
-            if text.startswith('-'):
-                loopFlag = True
-                text = text[1:]
-                if data:
-                    prev = data[-1]
-                else:
-                    prev = 0
-            if text.startswith('0'):
-                next_list = [10]
-                text = text[1:]
-            elif text.startswith('+'):
-                next_list = [11]
-                text = text[1:]
-            elif text.startswith('10'):
-                next_list = [10]
-                text = text[2:]
-            elif text.startswith('110'):
-                next_list = [1, 10]
-                text = text[3:]
-            elif text.startswith('1112'):
-                next_list = [11, 12]
-                text = text[4:]
-            elif text.startswith('111'):
-                next_list = [1, 11]
-                text = text[3:]
-            elif text.startswith('112'):
-                next_list = [1, 12]
-                text = text[3:]
-            elif text.startswith('11'):
-                next_list = [11]
-                text = text[2:]
-            elif text.startswith('12'):
-                if data:
-                    next_list = [12]
-                else:
-                    next_list = [1, 2]
-                text = text[2:]
-            elif text:
+
+        mask: int = 0
+        last: Optional[int] = None
+        i: int = 0
+        n: int = len(text)
+
+        while i < n:
+            is_range = text[i] == '-'
+
+            if is_range:
+                i += 1
+                prev = 0 if last is None else last
+
+            state, matched = 0, None
+            j = i
+
+            while j < n and (state := _TRANSITIONS[state].get(text[j])) is not None:
+                j += 1
+
+                if _ACCEPT[state] is not None:
+                    matched = (state, j)
+
+            if matched is not None:
+                state, i = matched
+                first, end, token = _ACCEPT[state][last is not None]
+            elif i < n:
                 try:
-                    next_list = [int(text[0], 16)]
-                    text = text[1:]
+                    first = end = int(text[i], 16)
                 except ValueError:
                     raise InvalidRankInput
+                token = 1 << (first-1) if 0 < first else 0
+                i += 1
+            else:
+                first = end = 12
+                token = 1 << 11
+
+            if is_range and first-prev > 1:
+                mask |= ((1 << (first-1)) - 1) & ~((1 << prev) - 1)
+
+            mask |= token
+            last = end
 
-            if loopFlag:
-                if not next_list:
-                    next_list = [12]
-                next = next_list[0]
-                while next - prev > 1:
-                    data.append(prev+1)
-                    prev += 1
-                loopFlag = False
-            data += next_list
-        return cls(data=[r for r in sorted(set(data)) if 0 < r < 13])
+        return cls.from_mask(mask)
 
     @classmethod
-    def get_ranks(cls: Type[T], text: str, ranks: list[T] = []) -> list[T]:
+    def get_ranks(
+        cls: Type[T],
+        text: str,
+        ranks: Optional[list[T]] = None,
+        size: int = 6,
+        teams: int = 2
+    ) -> list[T]:
+        if ranks is None:
+            ranks = []
         for t in text.split():
             rank: cls = cls.from_text(t)
-            if rank.validate(ranks=ranks):
+            if rank.validate(ranks=ranks, size=size):
                 ranks.append(rank)
-        if len(ranks) == 1:
+        if len(ranks) == teams-1:
             rank: cls = cls()
-            if rank.validate(ranks=ranks):
+            if rank.validate(ranks=ranks, size=size):
                 ranks.append(rank)
         return ranks
 
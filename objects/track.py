@@ -27,11 +27,7 @@ class Track(Enum):
 
     @staticmethod
     def from_nick(nick: str) -> Optional[Track]:
-        name = nick.lower()
-        for track in Track:
-            if name in track.aliases:
-                return track
-        return None
+        return _NICKS.get(nick.lower())
 
     def __str__(self):
         return self._name_
@@ -542,4 +538,7 @@ class Track(Enum):
         'bRR',
         '3DS虹',
         {'brr7', 'brr', 'rr7', '3dsレインボーロード', '3ds虹', '3dsにじ','3にじ'}
-    )
\ No newline at end of file
+    )
+
+
+_NICKS: dict[str, Track] = {alias: track for track in reversed(Track) for alias in track.value[4]}
@@ -1,4 +1,12 @@
+from .classifier import *
 from .cog import *
 from .components import *
 from .errors import *
+from .history import *
+from .mirror import *
+from .overlay import *
 from .plotting import *
+from .probability import *
+from .renderer import *
+from .solver import *
+from .updater import *
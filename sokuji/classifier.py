@@ -0,0 +1,52 @@
+from __future__ import annotations
+from typing import Optional
+from enum import Enum
+
+from objects import Track
+from objects.rank import _TRANSLATE_TABLE
+from common.metrics import get_stats
+
+
+_RANK_CHARS = frozenset('0123456789-+ ') | frozenset(map(chr, _TRANSLATE_TABLE))
+_STATS = get_stats('sokuji.listener')
+
+
+class InputKind(Enum):
+
+    BACK = 'back'
+    RANK = 'rank'
+    TRACK = 'track'
+
+
+def _classify(text: str) -> Optional[InputKind]:
+
+    if not text:
+        return None
+
+    if text == 'back':
+        return InputKind.BACK
+
+    if _RANK_CHARS.issuperset(text):
+        return InputKind.RANK if text.strip() else None
+
+    if Track.from_nick(text) is not None:
+        return InputKind.TRACK
+
+    return None
+
+
+def classify(text: str) -> Optional[InputKind]:
+    """Cheap pre-check run by the listener before any state lookup.
+
+    Only ``back``, rank inputs and track nicknames pass; everything else is
+    dropped without touching the mogi registry or the network.
+    """
+    kind = _classify(text)
+
+    if kind is None:
+        _STATS.incr('miss')
+    else:
+        _STATS.incr('hit')
+        _STATS.incr(kind.value)
+
+    return kind
@@ -1,7 +1,7 @@
 from typing import Optional, Union
 from datetime import timedelta
 from copy import copy
-from discord.ext import commands
+from discord.ext import commands, pages
 from discord import (
     Role,
     Member,
@@ -14,8 +14,15 @@ from discord import (
 )
 from .errors import *
 from .components import Mogi
-
-from objects import Rank, Race, Track
+from .history import MogiLog
+from .classifier import classify
+from .renderer import RENDERER
+from .mirror import MIRRORS
+from .overlay import OVERLAY
+from .updater import ChannelUpdater
+
+from objects import Format, Race, Track
+from common import MyEmbed, get_integers
 from common.utils import get_team_name, post_result
 from common.timezones import TZ
 
@@ -29,12 +36,26 @@ class Sokuji(commands.Cog, name='Sokuji'):
         self.hide: bool = False
         self.description: str = 'About Sokuji'
         self.description_localizations: dict[str, str] = {'ja':'即時関連'}
+        RENDERER.start()
+        MIRRORS.bind(bot)
+
+
+    def cog_unload(self) -> None:
+        RENDERER.shutdown()
+        self.bot.loop.create_task(OVERLAY.stop())
 
 
+    @commands.Cog.listener('on_ready')
+    async def start_overlay(self) -> None:
+        await OVERLAY.start()
+
+
+    updater = ChannelUpdater()
     mogi = SlashCommandGroup(name='mogi')
     race = mogi.create_subgroup(name='race')
     penalty = mogi.create_subgroup(name='penalty')
     banner = mogi.create_subgroup('banner', 'Banner')
+    mirror = mogi.create_subgroup('mirror', 'Mirror')
 
 
     @message_command(name='Register Result')
@@ -50,37 +71,54 @@ class Sokuji(commands.Cog, name='Sokuji'):
             m = Mogi().convert(message)
             now = message.created_at + timedelta(hours=TZ.from_locale(ctx.locale).offset)
             payload = {
-                'enemy': m.tags[1],
+                'enemy': ' / '.join(m.tags[1:]),
                 'score': m.total[0],
-                'enemyScore':m.total[1],
+                'enemyScore': max(m.total[1:]),
                 'date': now.strftime('%Y-%m-%d %H:%M:%S')
             }
             await post_result(ctx.guild_id, **payload)
-            content = f'{m.tags[0]} vs {m.tags[1]}\n`{Mogi.score_to_string(m.total)}`'
+            content = f'{" vs ".join(m.tags)}\n`{Mogi.score_to_string(m.total)}`'
             await ctx.respond(('戦績を登録しました。\n'if m.is_ja else 'Result registered.\n') + content)
         else:
             raise InvalidMessage
 
 
     @staticmethod
-    async def start(ctx: ContextLike, tag: str, role: Optional[Role]=None) -> None:
+    async def start(
+        ctx: ContextLike,
+        tag: str,
+        role: Optional[Role]=None,
+        format: Format = Format.V6
+    ) -> None:
         name = await get_team_name(ctx.guild.id) or ctx.guild.name
-        mogi = Mogi(tags=[name, tag])
-        flag = isinstance(ctx, commands.Context)
+        tags = [name, tag]
+
+        if format.teams > 2:
+            tags = [name, *(t.strip() for t in tag.split(',') if t.strip())][:format.teams]
+            tags += [f'Team {i+1}' for i in range(len(tags), format.teams)]
+
+        async with Sokuji.updater.lock(ctx.channel.id):
+            mogi = Mogi(tags=tags, format=format)
+            flag = isinstance(ctx, commands.Context)
+
+            if role is not None:
+                mogi.banner_users = {f'{m.name}{m.discriminator}' for m in role.members}
+                if flag:
+                    await ctx.send(embed=await mogi.updater_lineup())
+                else:
+                    await ctx.respond(embed=await mogi.updater_lineup())
 
-        if role is not None:
-            mogi.banner_users = {f'{m.name}{m.discriminator}' for m in role.members}
             if flag:
-                await ctx.send(embed=await mogi.updater_lineup())
+                mogi.message = await ctx.send(embed=mogi.embed)
             else:
-                await ctx.respond(embed=await mogi.updater_lineup())
+                mogi.is_ja = ctx.locale == 'ja'
+                response = await ctx.respond(embed=mogi.embed)
+                # The interaction token expires after 15 minutes; edit and delete through the channel.
+                mogi.message = ctx.channel.get_partial_message(response.id)
 
-        if flag:
-            await ctx.send(embed=mogi.embed)
-        else:
-            mogi.is_ja = ctx.locale == 'ja'
-            await ctx.respond(embed=mogi.embed)
-        return
+            mogi.open_log()
+            Mogi.register(ctx.channel.id, mogi)
+            return
 
 
     @mogi.command(
@@ -106,10 +144,19 @@ class Sokuji(commands.Cog, name='Sokuji'):
             description = 'Member role',
             description_localizations = {'ja':'参加メンバーのロール'},
             default = None
+        ),
+        format: Option(
+            str,
+            name = 'format',
+            name_localizations = {'ja':'形式'},
+            description = 'War format (separate enemy names with commas)',
+            description_localizations = {'ja':'対戦形式 (複数の相手チームはカンマ区切り)'},
+            choices = [f.label for f in reversed(Format)],
+            default = Format.V6.label
         )
         ) -> None:
         await ctx.response.defer()
-        await Sokuji.start(ctx, enemy, role)
+        await Sokuji.start(ctx, enemy, role, Format.from_label(format))
 
 
     @commands.command(
@@ -117,7 +164,7 @@ class Sokuji(commands.Cog, name='Sokuji'):
         aliases=['sokuji', 'v', 'vs', 'start'],
         description='Start Mogi.',
         brief='即時集計の開始',
-        usage='!v [@role] <enemy>',
+        usage='!v [@role] [format] <enemy>',
         hidden=False
     )
     @commands.guild_only()
@@ -128,21 +175,28 @@ class Sokuji(commands.Cog, name='Sokuji'):
         *,
         tag: str
         ) -> None:
-        await Sokuji.start(ctx, tag, role)
+        label, _, rest = tag.partition(' ')
+
+        if (format := Format.from_label(label)) is not None and rest:
+            await Sokuji.start(ctx, rest, role, format)
+        else:
+            await Sokuji.start(ctx, tag, role)
 
 
     @staticmethod
     async def end(ctx: ContextLike) -> None:
-        sokuji = await Mogi.get(ctx.channel)
-        sokuji.is_archive = True
-        await sokuji.refresh()
-
-        if isinstance(ctx, commands.Context):
-            await ctx.send('即時を終了しました。' if sokuji.is_ja else 'Finished sokuji.')
-        else:
-            await ctx.respond('即時を終了しました。' if sokuji.is_ja else 'Finished sokuji.')
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            sokuji.is_archive = True
+            await sokuji.refresh()
+            Mogi.register(ctx.channel.id, sokuji)
+
+            if isinstance(ctx, commands.Context):
+                await ctx.send('即時を終了しました。' if sokuji.is_ja else 'Finished sokuji.')
+            else:
+                await ctx.respond('即時を終了しました。' if sokuji.is_ja else 'Finished sokuji.')
 
-        return
+            return
 
 
     @mogi.command(
@@ -171,15 +225,17 @@ class Sokuji(commands.Cog, name='Sokuji'):
 
     @staticmethod
     async def resume(ctx: ContextLike) -> None:
-        sokuji = await Mogi.get(ctx.channel, True)
-        sokuji.is_archive = False
-        await sokuji.refresh()
-
-        if isinstance(ctx, commands.Context):
-            await ctx.send('即時を再開します。' if sokuji.is_ja else 'Resumed sokuji.')
-        else:
-            await ctx.respond('即時を再開します。' if sokuji.is_ja else 'Resumed sokuji.')
-        return
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel, True)
+            sokuji.is_archive = False
+            await sokuji.refresh()
+            Mogi.register(ctx.channel.id, sokuji)
+
+            if isinstance(ctx, commands.Context):
+                await ctx.send('即時を再開します。' if sokuji.is_ja else 'Resumed sokuji.')
+            else:
+                await ctx.respond('即時を再開します。' if sokuji.is_ja else 'Resumed sokuji.')
+            return
 
 
     @mogi.command(
@@ -223,6 +279,16 @@ class Sokuji(commands.Cog, name='Sokuji'):
             description_localizations = {'ja':'相手チームの名前'},
             default = None
         ),
+        team: Option(
+            int,
+            name = 'team',
+            name_localizations = {'ja':'チーム番号'},
+            description = 'Team number to rename, in the order of the tags. (default to 2)',
+            description_localizations = {'ja':'名前を変更するチームの番号、タグの順(デフォルトは2)'},
+            min_value = 1,
+            max_value = 6,
+            default = 2
+        ),
         role: Option(
             Role,
             name = 'role',
@@ -243,20 +309,23 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
-        payload = {}
-        sokuji = await Mogi.get(ctx.channel)
-        sokuji.tags[1] = enemy or sokuji.tags[1]
+        async with Sokuji.updater.lock(ctx.channel.id):
+            payload = {}
+            sokuji = await Mogi.get(ctx.channel)
 
-        if role is not None:
-            sokuji.banner_users = {f'{m.name}{m.discriminator}' for m in role.members}
-            payload['embed'] = (await sokuji.updater_lineup()).copy()
+            if enemy is not None:
+                sokuji.set_tag(sokuji.team_index(team), enemy)
+
+            if role is not None:
+                sokuji.set_banner_users({f'{m.name}{m.discriminator}' for m in role.members})
+                payload['embed'] = (await sokuji.updater_lineup()).copy()
 
-        if locale is not None:
-            sokuji.is_ja = locale == 'ja'
+            if locale is not None:
+                sokuji.set_language(locale == 'ja')
 
-        await sokuji.refresh()
-        payload['content'] = '即時を編集しました。' if sokuji.is_ja else 'Edited sokuji.'
-        await ctx.respond(**payload)
+            await sokuji.refresh()
+            payload['content'] = '即時を編集しました。' if sokuji.is_ja else 'Edited sokuji.'
+            await ctx.respond(**payload)
 
 
     @race.command(
@@ -295,10 +364,11 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
-        sokuji = await Mogi.get(ctx.channel)
-        await sokuji.add_race(rank, track, race_num)
-        await sokuji.send(ctx.channel)
-        await ctx.respond('レースを追加しました。' if sokuji.is_ja else 'Added race.')
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            await sokuji.add_race(rank, track, race_num)
+            await sokuji.send(ctx.channel)
+            await ctx.respond('レースを追加しました。' if sokuji.is_ja else 'Added race.')
 
 
     @commands.command(
@@ -310,12 +380,13 @@ class Sokuji(commands.Cog, name='Sokuji'):
     )
     @commands.guild_only()
     async def change_tag(self, ctx: commands.Context, *, name: str) -> None:
-        sokuji = await Mogi.get(ctx.channel)
-        sokuji.tags[-1] = name
-        await sokuji.refresh()
-        await sokuji.update_obs()
-        await ctx.send(f'タグを**{name}**へ変更しました。' if sokuji.is_ja else f'Changed tag **{name}**.')
-        return
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            sokuji.set_tag(-1, name)
+            await sokuji.refresh()
+            await sokuji.update_obs()
+            await ctx.send(f'タグを**{name}**へ変更しました。' if sokuji.is_ja else f'Changed tag **{name}**.')
+            return
 
 
     @race.command(
@@ -340,10 +411,11 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
-        sokuji = await Mogi.get(ctx.channel)
-        await sokuji.back(race_num-1)
-        await sokuji.refresh()
-        await ctx.respond('レースを削除しました。' if sokuji.is_ja else 'Deleted race.')
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            await sokuji.back(race_num-1)
+            await sokuji.refresh()
+            await ctx.respond('レースを削除しました。' if sokuji.is_ja else 'Deleted race.')
 
 
     @race.command(
@@ -384,34 +456,37 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
-        sokuji = await Mogi.get(ctx.channel)
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
 
-        try:
-            old_race: Race = copy(sokuji.races[race_num-1])
-            sokuji.races[race_num-1] = Race(
-                Rank.get_ranks(rank) if rank is not None else old_race.ranks,
+            try:
+                old_race: Race = copy(sokuji.races[race_num-1])
+            except IndexError:
+                raise OutOfRange
+
+            sokuji.set_race(race_num-1, Race(
+                sokuji.format.parse(rank) if rank is not None else old_race.ranks,
                 Track.from_nick(track) or old_race.track
-            )
-        except IndexError:
-            raise OutOfRange
+            ))
 
-        await sokuji.update_obs()
-        await sokuji.refresh()
-        await ctx.respond('レースを編集しました。' if sokuji.is_ja else 'Edited race.')
+            await sokuji.update_obs()
+            await sokuji.refresh()
+            await ctx.respond('レースを編集しました。' if sokuji.is_ja else 'Edited race.')
 
 
     @staticmethod
     async def send_banner_url(ctx: ContextLike, members: set[Member]) -> None:
-        sokuji = await Mogi.get(ctx.channel)
-        new_users = {f'{member.name}{member.discriminator}' for member in members}
-        sokuji.banner_users |= new_users
-        await sokuji.refresh()
-        await sokuji.update_obs()
-
-        if isinstance(ctx, commands.Context):
-            await ctx.send(embed=Mogi.banner_embed(new_users))
-        else:
-            await ctx.respond(embed=Mogi.banner_embed(new_users))
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            new_users = {f'{member.name}{member.discriminator}' for member in members}
+            sokuji.set_banner_users(sokuji.banner_users | new_users)
+            await sokuji.refresh()
+            await sokuji.update_obs()
+
+            if isinstance(ctx, commands.Context):
+                await ctx.send(embed=Mogi.banner_embed(new_users))
+            else:
+                await ctx.respond(embed=Mogi.banner_embed(new_users))
 
 
     @banner.command(
@@ -468,18 +543,19 @@ class Sokuji(commands.Cog, name='Sokuji'):
 
     @staticmethod
     async def remove_banner_user(ctx: ContextLike, members: set[Member]) -> None:
-        sokuji = await Mogi.get(ctx.channel)
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
 
-        sokuji.banner_users -= {f'{member.name}{member.discriminator}' for member in members}
-        await sokuji.update_obs()
-        await sokuji.refresh()
+            sokuji.set_banner_users(sokuji.banner_users - {f'{member.name}{member.discriminator}' for member in members})
+            await sokuji.update_obs()
+            await sokuji.refresh()
 
-        if isinstance(ctx, commands.Context):
-            await ctx.send('バナーの更新を停止しました。' if sokuji.is_ja else 'Finished updating banner.')
-        else:
-            await ctx.respond('バナーの更新を停止しました。' if sokuji.is_ja else 'Finished updating banner.')
+            if isinstance(ctx, commands.Context):
+                await ctx.send('バナーの更新を停止しました。' if sokuji.is_ja else 'Finished updating banner.')
+            else:
+                await ctx.respond('バナーの更新を停止しました。' if sokuji.is_ja else 'Finished updating banner.')
 
-        return
+            return
 
 
     @banner.command(
@@ -556,17 +632,15 @@ class Sokuji(commands.Cog, name='Sokuji'):
             default = 'repick',
             required = False
         ),
-        index : Option(
+        team : Option(
             int,
             name = 'target',
             name_localizations = {'ja': 'チーム'},
-            description = 'Team  to add penalty. (default to your team)',
-            description_localizations = {'ja': 'ペナルティを追加するチーム(デフォルトは自チーム)'},
-            choices = [
-                OptionChoice(name='Your team', name_localizations = {'ja':'自チーム'}, value = 0),
-                OptionChoice(name='Enemy', name_localizations = {'ja':'敵チーム'}, value = 1)
-            ],
-            default = 0,
+            description = 'Team number in the order of the tags. (default to 1, your team)',
+            description_localizations = {'ja': 'ペナルティを追加するチームの番号、タグの順(デフォルトは1の自チーム)'},
+            min_value = 1,
+            max_value = 6,
+            default = 1,
             required = False
         ),
         amount: Option(
@@ -580,16 +654,14 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
-        sokuji = await Mogi.get(ctx.channel)
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
 
-        if type == 'repick':
-            sokuji.repick[index] += amount
-        else:
-            sokuji.penalty[index] += amount
+            sokuji.add_penalty(type, sokuji.team_index(team), amount)
 
-        await sokuji.refresh()
-        await sokuji.update_obs()
-        await ctx.respond('ペナルティを追加しました。' if sokuji.is_ja else 'Added penalty.')
+            await sokuji.refresh()
+            await sokuji.update_obs()
+            await ctx.respond('ペナルティを追加しました。' if sokuji.is_ja else 'Added penalty.')
 
 
     @penalty.command(
@@ -616,11 +688,255 @@ class Sokuji(commands.Cog, name='Sokuji'):
         )
     ) -> None:
         await ctx.response.defer()
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            sokuji.clear_penalty(type)
+            await sokuji.refresh()
+            await sokuji.update_obs()
+            await ctx.respond('ペナルティを削除しました。' if sokuji.is_ja else 'Cleared penalty.')
+
+
+    @mogi.command(
+        name = 'clinch',
+        description = 'Show what is needed to lock the win.',
+        description_localizations = {'ja': '勝利確定の条件を表示'}
+    )
+    @commands.guild_only()
+    async def mogi_clinch(self, ctx: ApplicationContext) -> None:
+        await ctx.response.defer(ephemeral=True)
         sokuji = await Mogi.get(ctx.channel)
-        setattr(sokuji, type, [0, 0])
-        await sokuji.refresh()
-        await sokuji.update_obs()
-        await ctx.respond('ペナルティを削除しました。' if sokuji.is_ja else 'Cleared penalty.')
+
+        if not sokuji.is_duel:
+            raise NotDuel
+
+        clinch = sokuji.clinch
+        e = MyEmbed(
+            title = '確定条件' if sokuji.is_ja else 'Clinch',
+            description = f'`{Mogi.score_to_string(sokuji.total)} @{clinch.left}`\n' + sokuji.clinch_text(clinch)
+        )
+
+        if clinch.patterns:
+            e.add_field(
+                name = f'`{clinch.need:+}`',
+                value = '\n'.join(f'`{p}`' for p in clinch.patterns[:10]),
+                inline = False
+            )
+
+        await ctx.respond(embed=e, ephemeral=True)
+
+
+    @staticmethod
+    async def step_history(ctx: ContextLike, steps: int, redo: bool = False) -> None:
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+
+            if redo:
+                sokuji.redo(steps)
+                content = 'やり直しました。' if sokuji.is_ja else 'Redone.'
+            else:
+                sokuji.undo(steps)
+                content = '元に戻しました。' if sokuji.is_ja else 'Undone.'
+
+            await sokuji.update_obs()
+            await sokuji.refresh()
+
+            if isinstance(ctx, commands.Context):
+                await ctx.send(content)
+            else:
+                await ctx.respond(content)
+
+
+    @mogi.command(
+        name = 'undo',
+        description = 'Undo the last changes.',
+        description_localizations = {'ja': '直前の操作を元に戻す'}
+    )
+    @commands.guild_only()
+    async def mogi_undo(
+        self,
+        ctx: ApplicationContext,
+        steps: Option(
+            int,
+            name = 'steps',
+            name_localizations = {'ja': '回数'},
+            min_value = 1,
+            default = 1,
+            required = False
+        )
+    ) -> None:
+        await ctx.response.defer()
+        await Sokuji.step_history(ctx, steps)
+
+
+    @commands.command(
+        name='undo',
+        description='Undo the last changes.',
+        brief='直前の操作を元に戻す',
+        usage='!undo [steps]',
+        hidden=False
+    )
+    @commands.guild_only()
+    async def text_mogi_undo(self, ctx: commands.Context, steps: int = 1) -> None:
+        await Sokuji.step_history(ctx, max(steps, 1))
+
+
+    @mogi.command(
+        name = 'redo',
+        description = 'Redo undone changes.',
+        description_localizations = {'ja': '元に戻した操作をやり直す'}
+    )
+    @commands.guild_only()
+    async def mogi_redo(
+        self,
+        ctx: ApplicationContext,
+        steps: Option(
+            int,
+            name = 'steps',
+            name_localizations = {'ja': '回数'},
+            min_value = 1,
+            default = 1,
+            required = False
+        )
+    ) -> None:
+        await ctx.response.defer()
+        await Sokuji.step_history(ctx, steps, True)
+
+
+    @commands.command(
+        name='redo',
+        description='Redo undone changes.',
+        brief='元に戻した操作をやり直す',
+        usage='!redo [steps]',
+        hidden=False
+    )
+    @commands.guild_only()
+    async def text_mogi_redo(self, ctx: commands.Context, steps: int = 1) -> None:
+        await Sokuji.step_history(ctx, max(steps, 1), True)
+
+
+    @staticmethod
+    async def send_replay(ctx: ApplicationContext, log: Optional[MogiLog]) -> None:
+
+        if log is None:
+            raise LogNotFound
+
+        embeds = []
+
+        for i, (_, state) in enumerate(log.replay(Mogi)):
+            e = state.embed
+            e.set_footer(text=f'Replay {i}/{log.head}')
+            embeds.append(e)
+
+        await pages.Paginator(pages=embeds, author_check=False).respond(ctx.interaction, ephemeral=True)
+
+
+    @mogi.command(
+        name = 'replay',
+        description = 'Replay the history of sokuji.',
+        description_localizations = {'ja': '即時の経過を再生'}
+    )
+    @commands.guild_only()
+    async def mogi_replay(self, ctx: ApplicationContext) -> None:
+        await ctx.response.defer(ephemeral=True)
+        sokuji = await Mogi.get(ctx.channel, True)
+        await Sokuji.send_replay(ctx, sokuji.log)
+
+
+    @message_command(name='Replay Sokuji')
+    @commands.guild_only()
+    async def replay_message(self, ctx: ApplicationContext, message: Message) -> None:
+        await ctx.response.defer(ephemeral=True)
+
+        if not Mogi.is_readable(message):
+            raise InvalidMessage
+
+        await Sokuji.send_replay(ctx, await MogiLog.load(Mogi().convert(message).id))
+
+
+    def mirror_target(self, ctx: ApplicationContext, text: str) -> int:
+        ids = get_integers(text)
+        channel = self.bot.get_channel(ids[0]) if ids else None
+
+        if channel is None or getattr(channel, 'guild', None) is None or channel.id == ctx.channel.id:
+            raise InvalidMirror
+
+        member = channel.guild.get_member(ctx.author.id)
+
+        if member is None or not channel.permissions_for(member).send_messages:
+            raise InvalidMirror
+
+        me = channel.permissions_for(channel.guild.me)
+
+        if not (me.send_messages and me.embed_links and me.attach_files):
+            raise InvalidMirror
+
+        return channel.id
+
+
+    @staticmethod
+    def mirror_list(sokuji: Mogi) -> str:
+        dead = MIRRORS.dead(sokuji.id)
+        return '\n'.join(f'<#{c}>' + (' ⚠' if c in dead else '') for c in sokuji.mirrors)
+
+
+    @mirror.command(
+        name = 'add',
+        description = 'Show this sokuji in another channel as well.',
+        description_localizations = {'ja': '即時を別のチャンネルにも表示'}
+    )
+    @commands.guild_only()
+    async def mogi_mirror_add(
+        self,
+        ctx: ApplicationContext,
+        channel: Option(
+            str,
+            name = 'channel',
+            name_localizations = {'ja': 'チャンネル'},
+            description = 'Channel ID, also of another server',
+            description_localizations = {'ja': 'チャンネルID (他のサーバーも可)'}
+        )
+    ) -> None:
+        await ctx.response.defer()
+        channel_id = self.mirror_target(ctx, channel)
+
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+            sokuji.add_mirror(channel_id)
+            await sokuji.refresh()
+            content = 'ミラーを追加しました。\n' if sokuji.is_ja else 'Added mirror.\n'
+            await ctx.respond(content + Sokuji.mirror_list(sokuji))
+
+
+    @mirror.command(
+        name = 'remove',
+        description = 'Stop showing this sokuji in another channel.',
+        description_localizations = {'ja': '別のチャンネルへの表示を終了'}
+    )
+    @commands.guild_only()
+    async def mogi_mirror_remove(
+        self,
+        ctx: ApplicationContext,
+        channel: Option(
+            str,
+            name = 'channel',
+            name_localizations = {'ja': 'チャンネル'},
+            description = 'Channel ID',
+            description_localizations = {'ja': 'チャンネルID'}
+        )
+    ) -> None:
+        await ctx.response.defer()
+        ids = get_integers(channel)
+
+        async with Sokuji.updater.lock(ctx.channel.id):
+            sokuji = await Mogi.get(ctx.channel)
+
+            if not ids:
+                raise MirrorNotFound
+
+            sokuji.remove_mirror(ids[0])
+            await sokuji.refresh()
+            content = 'ミラーを削除しました。\n' if sokuji.is_ja else 'Removed mirror.\n'
+            await ctx.respond(content + Sokuji.mirror_list(sokuji))
 
 
     @commands.Cog.listener('on_message')
@@ -629,17 +945,11 @@ class Sokuji(commands.Cog, name='Sokuji'):
         if message.author.bot or message.guild is None:
             return
 
-        try:
-            sokuji = await Mogi.get(message.channel)
-            if message.content == 'back':
-                await sokuji.back()
-            else:
-                await sokuji.add_race(message.content)
-            await sokuji.send(message.channel)
-            return
-        except (MogiNotFound, MogiArchived, NotAddable, NotBackable, InvalidRankInput):
+        if (kind := classify(message.content)) is None:
             return
 
+        Sokuji.updater.put(message, kind)
+
 
 def setup(bot: commands.Bot) -> None:
     bot.add_cog(Sokuji(bot))
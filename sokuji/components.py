@@ -1,25 +1,52 @@
 from __future__ import annotations
 from typing import TYPE_CHECKING, Optional, Union, TypeVar, Type
 from typing_extensions import Self
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from copy import copy
+from collections import OrderedDict
+from discord import HTTPException, NotFound
+import binascii
+import secrets
+import base64
+import json
+import zlib
 
 from .errors import *
-from .plotting import make
-from objects import Race, Rank, Track
-from common import MyEmbed, get_integers, update_sokuji
+from .history import MogiLog
+from .probability import Odds, odds
+from .solver import Clinch, solve
+from .plotting import to_file
+from .renderer import RENDERER, RenderRequest
+from .mirror import MIRRORS
+from .overlay import OVERLAY
+from objects import Format, Race, Rank, Track
+from common import MyEmbed, get_integers, update_sokuji, clear_sokuji
+from common.metrics import get_stats
+from common.assets import ASSETS
 from constants import MY_ID, BOT_IDS
 
 
 if TYPE_CHECKING:
     from collections.abc import Callable
-    from discord import Message, WebhookMessage, File
+    from discord import Message, WebhookMessage
     from discord.abc import Messageable
 
     MessageLike = Union[Message, WebhookMessage]
     T = TypeVar('T', Callable)
 
 
+_EXPIRY = timedelta(hours=1)
+_TOKEN_PREFIX = 's1:'
+# Live mogi of each channel, None once a channel is known to have none.
+_ACTIVE: OrderedDict[int, Optional[Mogi]] = OrderedDict()
+_ACTIVE_LIMIT = 2048
+_MIRROR_LIMIT = 5
+_OBS_STATS = get_stats('sokuji.obs')
+_OBS_LIMIT = 256
+# Last overlay payload of each mogi, its banner users, and those whose Deta document holds it.
+_OBS: OrderedDict[str, tuple[dict, frozenset[str], frozenset[str]]] = OrderedDict()
+
+
 def archive_check(func: Type[T]) -> T:
     def predicate(*args, **kwargs):
         mogi: Mogi = args[0]
@@ -30,9 +57,19 @@ def archive_check(func: Type[T]) -> T:
     return predicate
 
 
+def _dump_race(race: Race) -> list:
+    return [*(r.mask for r in race.ranks), race.track.name if race.track else None]
+
+
+def _load_race(data: list) -> Race:
+    return Race([Rank.from_mask(m) for m in data[:-1]], Track[data[-1]] if data[-1] else None)
+
+
 class Mogi:
 
     __slots__ = (
+        'id',
+        'format',
         'races',
         'tags',
         'banner_users',
@@ -41,57 +78,124 @@ class Mogi:
         'message',
         'is_archive',
         'is_ja',
-        'loaded_track'
+        'loaded_track',
+        'log',
+        'mirrors',
+        'mirror_messages',
+        'is_mirror',
+        '_card_prefix',
+        '__race_total'
     )
 
     def __init__(
         self,
-        races: list[Race] = [],
+        races: Optional[list[Race]] = None,
         tags: Optional[list[str]] = None,
-        banner_users: set[str] = set(),
-        penalty: list[int] = [0, 0],
-        repick: list[int] = [0, 0],
+        banner_users: Optional[set[str]] = None,
+        penalty: Optional[list[int]] = None,
+        repick: Optional[list[int]] = None,
         message: Optional[MessageLike] = None,
         is_archive: bool = False,
         is_ja: bool = True,
-        loaded_track: Optional[Track] = None
+        loaded_track: Optional[Track] = None,
+        id: Optional[str] = None,
+        format: Format = Format.V6,
+        mirrors: Optional[list[int]] = None,
+        mirror_messages: Optional[dict[int, int]] = None,
+        is_mirror: bool = False
     ) -> None:
-        self.races: list[Race] = races
+        self.id: str = id or secrets.token_hex(6)
+        self.format: Format = format
+        self.races: list[Race] = races if races is not None else []
         self.tags: list[str] = tags
-        self.banner_users: set[str] = banner_users
-        self.penalty: list[int] = penalty
-        self.repick: list[int] = repick
+        self.banner_users: set[str] = banner_users if banner_users is not None else set()
+        self.penalty: list[int] = penalty if penalty is not None else [0]*format.teams
+        self.repick: list[int] = repick if repick is not None else [0]*format.teams
         self.message: MessageLike = message
         self.is_archive: bool = is_archive
         self.is_ja: bool = is_ja
         self.loaded_track: Optional[Track] = loaded_track
+        self.log: Optional[MogiLog] = None
+        self.mirrors: list[int] = mirrors if mirrors is not None else []
+        self.mirror_messages: dict[int, int] = mirror_messages if mirror_messages is not None else {}
+        self.is_mirror: bool = is_mirror
+        self._card_prefix: Optional[tuple[int, ...]] = None
+        self.__race_total: list[int] = [0]*format.teams
+        self.reset_total()
+
+    def reset_total(self) -> None:
+        self.__race_total = [0]*self.format.teams
+
+        for race in self.races:
+            self.__count(race, 1)
+
+    def __count(self, race: Race, sign: int) -> None:
+        for i, score in enumerate(race.scores):
+            self.__race_total[i] += sign*score
 
     @property
     def total(self) -> list[int]:
-        scores = [0, 0]
+        return [r+p+q for r, p, q in zip(self.__race_total, self.penalty, self.repick)]
+
+    @property
+    def is_duel(self) -> bool:
+        return self.format.teams == 2
+
+    @property
+    def dif(self) -> int:
+        """Lead over the best other team."""
+        total = self.total
+        return total[0] - max(total[1:])
+
+    @property
+    def odds(self) -> Odds:
+        total = self.total
+        return odds(total[0]-total[1], 12-len(self.races))
+
+    @property
+    def clinch(self) -> Clinch:
+        return solve(
+            (race.scores[0]-race.scores[1] for race in self.races),
+            self.penalty[0]+self.repick[0]-self.penalty[1]-self.repick[1]
+        )
+
+    def clinch_text(self, clinch: Optional[Clinch] = None) -> str:
+        c = clinch or self.clinch
+
+        if c.result:
+            if self.is_ja:
+                return f'{c.locked or 0}レース目で' + ('勝利確定' if c.result > 0 else '敗北確定')
+            return ('Win' if c.result > 0 else 'Loss') + f' locked after race {c.locked or 0}'
+
+        if c.need is None:
+            return '勝利確定不可' if self.is_ja else 'Win cannot be locked'
 
-        for r in self.races:
-            scores[0] += r.scores[0]
-            scores[1] += r.scores[1]
+        if self.is_ja:
+            text = f'残り{c.left}レース各`{c.need:+}`以上で勝利確定 ({c.count}通り)'
+            return text + (f'\n最短{c.earliest}レース目で確定' if c.earliest else '')
 
-        scores[0] += self.penalty[0] + self.repick[0]
-        scores[1] += self.penalty[1] + self.repick[1]
-        return scores
+        text = f'`{c.need:+}` or more in each of the last {c.left} races ({c.count} patterns)'
+        return text + (f'\nEarliest lock: race {c.earliest}' if c.earliest else '')
 
     @staticmethod
     def score_to_string(scores: list[int], compact: bool = False) -> str:
-        return ' : '.join(map(str, scores)) + ('({:+})'.format(scores[0]-scores[1]) if not compact else '')
+        return ' : '.join(map(str, scores)) + ('({:+})'.format(scores[0]-max(scores[1:])) if not compact else '')
 
 
     @property
     def embed(self) -> MyEmbed:
         title = '即時集計 ' if self.is_ja else 'Sokuji '
-        title += f'6v6\n{self.tags[0]} - {self.tags[1]}'
+        title += f'{self.format.label}\n' + ' - '.join(self.tags)
         e = MyEmbed(
             title = title,
             description = f'`{Mogi.score_to_string(self.total)} @{12-len(self.races)}`',
         )
 
+        if len(self.races) < 12 and self.is_duel:
+            o = self.odds
+            labels = ('勝ち', '引き分け', '負け') if self.is_ja else ('Win', 'Draw', 'Lose')
+            e.description += '\n' + ' / '.join(f'{l} {p:.1%}' for l, p in zip(labels, o))
+
         for i, race in enumerate(self.races):
             txt = f'{i+1} '
             if race.track is not None:
@@ -102,10 +206,13 @@ class Mogi:
                 inline = False
             )
 
-        if self.penalty != [0, 0]:
+        if 0 < len(self.races) < 12 and self.is_duel:
+            e.add_field(name='確定条件' if self.is_ja else 'Clinch', value=self.clinch_text(), inline=False)
+
+        if any(self.penalty):
             e.add_field(name='Penalty', value=f'`{Mogi.score_to_string(self.penalty, True)}`', inline=False)
 
-        if self.repick != [0, 0]:
+        if any(self.repick):
             e.add_field(name='Repick', value=f'`{Mogi.score_to_string(self.repick, True)}`', inline=False)
 
         if self.banner_users:
@@ -114,14 +221,82 @@ class Mogi:
         if self.is_archive:
             e.set_author(name="アーカイブ" if self.is_ja else 'Archive' )
 
+        track = next((race.track for race in reversed(self.races) if race.track is not None), None)
+
+        if track is not None and (url := ASSETS.url(f'{track.nick_en}.png')) is not None:
+            e.set_thumbnail(url=url)
+
+        e.set_footer(text=self.to_token())
         return e
 
 
+    def to_token(self, is_mirror: bool = False) -> str:
+        """Serialize the whole state into a compact string kept in the embed footer."""
+        state = [
+            self.tags,
+            int(self.is_ja),
+            int(self.is_archive),
+            [_dump_race(race) for race in self.races],
+            self.penalty,
+            self.repick,
+            sorted(self.banner_users),
+            self.id,
+            self.format.size,
+            [] if is_mirror else self.mirror_entries(),
+            int(is_mirror)
+        ]
+        data = zlib.compress(json.dumps(state, ensure_ascii=False, separators=(',', ':')).encode(), 9)
+        return _TOKEN_PREFIX + base64.urlsafe_b64encode(data).decode().rstrip('=')
+
+
+    def load_token(self, token: str) -> bool:
+
+        if not isinstance(token, str) or not token.startswith(_TOKEN_PREFIX):
+            return False
+
+        body = token[len(_TOKEN_PREFIX):]
+
+        try:
+            state = json.loads(zlib.decompress(base64.urlsafe_b64decode(body + '=' * (-len(body) % 4))))
+            tags, is_ja, is_archive, races, penalty, repick, banner_users, *extra = state
+            self.format = Format(extra[1]) if len(extra) > 1 else Format.V6
+            self.races = [_load_race(race) for race in races]
+        except (binascii.Error, zlib.error, ValueError, TypeError, KeyError):
+            return False
+
+        self.tags = tags
+        self.is_ja = bool(is_ja)
+        self.is_archive = bool(is_archive)
+        self.penalty = penalty
+        self.repick = repick
+        self.banner_users = set(banner_users)
+
+        if extra:
+            self.id = extra[0]
+
+        # Mirrors were plain channel ids before their message ids were kept.
+        mirrors = extra[2] if len(extra) > 2 else []
+        self.mirrors = [m[0] if isinstance(m, list) else m for m in mirrors]
+        self.mirror_messages = {m[0]: m[1] for m in mirrors if isinstance(m, list)}
+        self.is_mirror = bool(extra[3]) if len(extra) > 3 else False
+
+        self.reset_total()
+        return True
+
+
     def convert(self, message: MessageLike) -> Self:
         e = message.embeds[0].copy()
         self.message = message
+
+        if self.load_token(e.footer.text):
+            return self
+
+        self.mirrors = []
+        self.mirror_messages = {}
+        self.is_mirror = False
         self.is_ja = '即時集計' in e.title
         self.tags = e.title.split('\n', maxsplit=1)[-1].split(' - ')
+        self.format = Format.V6
         self.races = []
         self.penalty = [0, 0]
         self.repick = [0, 0]
@@ -136,6 +311,8 @@ class Mogi:
                 setattr(self, field.name.lower(), [numbers[0]+old_data[0], numbers[1]+old_data[1]])
             elif field.name == 'Members':
                 self.banner_users = set(field.value.split('> @', maxsplit=1)[-1].split(', @'))
+            elif field.name in ('Clinch', '確定条件'):
+                continue
             else:
                 track: Optional[Track] = None
                 if '-' in field.name:
@@ -143,6 +320,7 @@ class Mogi:
                     track = Track.from_nick(txt[txt.find('-')+2:])
                 self.races.append(Race([Rank(numbers[-6:]), Rank({i for i in range(1, 13)} - set(numbers[-6:]))], track))
 
+        self.reset_total()
         return self
 
 
@@ -161,32 +339,129 @@ class Mogi:
             return False
 
 
+    @property
+    def is_expired(self) -> bool:
+        return (
+            self.message is None
+            or self.message.created_at < datetime.now(timezone.utc) - _EXPIRY
+        )
+
+
     @staticmethod
-    async def get(messageable: Messageable, include_archive: bool = False) -> Mogi:
+    def register(channel_id: int, mogi: Optional[Mogi]) -> None:
+        _ACTIVE[channel_id] = mogi
+        _ACTIVE.move_to_end(channel_id)
+
+        while len(_ACTIVE) > _ACTIVE_LIMIT:
+            _ACTIVE.popitem(last=False)
+
+
+    @staticmethod
+    async def fetch(messageable: Messageable) -> Optional[Mogi]:
         mogi = Mogi()
 
         async for message in messageable.history(
-            after = datetime.now() - timedelta(hours=1),
+            after = datetime.now(timezone.utc) - _EXPIRY,
             oldest_first = False
         ):
             if mogi.loaded_track is None:
                 mogi.loaded_track = Track.from_nick(message.content)
 
-            if Mogi.is_valid(message):
-                mogi.convert(message)
-
-                if mogi.is_archive:
-                    if include_archive:
-                        return mogi
-                    else:
-                        raise MogiArchived
+            # Mirrors carry the state of a mogi running in another channel.
+            if Mogi.is_valid(message) and not mogi.convert(message).is_mirror:
                 return mogi
 
-        raise MogiNotFound
+        return None
+
+
+    @staticmethod
+    async def get(messageable: Messageable, include_archive: bool = False) -> Mogi:
+        try:
+            mogi = _ACTIVE[messageable.id]
+            _ACTIVE.move_to_end(messageable.id)
+        except KeyError:
+            mogi = await Mogi.fetch(messageable)
+
+            # Registered only with its log, so a failed load is retried by the next command.
+            if mogi is not None and not mogi.is_expired:
+                await mogi.load_log()
+
+            Mogi.register(messageable.id, mogi)
+
+        if mogi is None or mogi.is_expired:
+            # The history holds nothing newer, so only the answer is kept.
+            _ACTIVE[messageable.id] = None
+            raise MogiNotFound
+
+        if mogi.is_archive and not include_archive:
+            raise MogiArchived
+
+        return mogi
+
+
+    def open_log(self) -> None:
+        self.log = MogiLog.new(self)
+
+
+    async def load_log(self) -> None:
+        """Attach the stored log, or start a new one if it does not end at the current state."""
+        log = await MogiLog.load(self.id)
+
+        if log is not None:
+            head = log.state_at(log.head, Mogi)
+            head.is_archive = self.is_archive
+            head.mirrors = self.mirrors
+            head.mirror_messages = self.mirror_messages
+
+            if head.to_token() == self.to_token():
+                self.log = log
+                return
+
+        self.open_log()
+
+
+    def apply(self, event: dict) -> None:
+        """Apply a log event without recording it."""
+        kind = event['t']
+
+        if kind == 'add':
+            race = _load_race(event['r'])
+
+            if event['i'] is None:
+                self.races.append(race)
+            else:
+                self.races.insert(event['i'], race)
+            self.__count(race, 1)
+        elif kind == 'back':
+            self.__count(self.races.pop(event['i']), -1)
+        elif kind == 'edit':
+            race = _load_race(event['r'])
+            self.__count(self.races[event['i']], -1)
+            self.races[event['i']] = race
+            self.__count(race, 1)
+        elif kind in ('penalty', 'repick'):
+            getattr(self, kind)[event['i']] += event['a']
+        elif kind == 'clear':
+            setattr(self, event['k'], [0]*self.format.teams)
+        elif kind == 'tag':
+            self.tags[event['i']] = event['v']
+        elif kind == 'banner':
+            self.banner_users = set(event['v'])
+        elif kind == 'lang':
+            self.is_ja = event['v']
+
+
+    def commit(self, event: dict) -> None:
+        self.apply(event)
+
+        if self.log is not None:
+            self.log.record(event, self)
+
+        self.prepare_card()
 
 
     @archive_check
-    async def add_race(
+    def push_race(
         self,
         rank_text: str,
         track_name: Optional[str] = None,
@@ -200,8 +475,7 @@ class Mogi:
         if not rank_string:
             raise InvalidRankInput
 
-        ranks = Rank.get_ranks(rank_string, [])
-        race = Race
+        ranks = self.format.parse(rank_string)
 
         if track_name is None:
             track = copy(self.loaded_track)
@@ -210,63 +484,249 @@ class Mogi:
 
         race = Race(ranks, track)
 
-        if not race.is_valid():
+        if not race.is_valid(self.format.teams):
             raise InvalidRankInput
         self.loaded_track = None
+        self.commit({'t': 'add', 'i': race_num-1 if race_num is not None else None, 'r': _dump_race(race)})
 
-        if race_num is not None:
-            try:
-                self.races.insert(race_num-1, race)
-            except IndexError:
-                raise OutOfRange
-        else:
-            self.races.append(race)
 
+    async def add_race(
+        self,
+        rank_text: str,
+        track_name: Optional[str] = None,
+        race_num: Optional[int] = None,
+        ) -> None:
+        self.push_race(rank_text, track_name, race_num)
         await self.update_obs()
 
 
     @archive_check
-    async def back(self, index: int = -1) -> None:
+    def pop_race(self, index: int = -1) -> None:
 
         if not self.races:
             raise NotBackable
 
-        try:
-            self.races.pop(index)
-        except IndexError:
+        if not -len(self.races) <= index < len(self.races):
+            raise OutOfRange
+
+        self.commit({'t': 'back', 'i': index})
+
+
+    def set_race(self, index: int, race: Race) -> None:
+
+        if not -len(self.races) <= index < len(self.races):
             raise OutOfRange
 
+        if not self.format.is_valid(race.ranks):
+            raise InvalidRankInput
+
+        self.commit({'t': 'edit', 'i': index, 'r': _dump_race(race)})
+
+
+    async def back(self, index: int = -1) -> None:
+        self.pop_race(index)
         await self.update_obs()
 
 
+    def team_index(self, team: int) -> int:
+        """Index of a team numbered from 1 in the order of the tags."""
+        if not 1 <= team <= self.format.teams:
+            raise InvalidTeam
+
+        return team - 1
+
+
+    def add_penalty(self, kind: str, index: int, amount: int) -> None:
+        self.commit({'t': kind, 'i': index, 'a': amount})
+
+
+    def clear_penalty(self, kind: str) -> None:
+        self.commit({'t': 'clear', 'k': kind})
+
+
+    def set_tag(self, index: int, name: str) -> None:
+        self.commit({'t': 'tag', 'i': index, 'v': name})
+
+
+    def set_banner_users(self, banner_users: set[str]) -> None:
+        self.commit({'t': 'banner', 'v': sorted(banner_users)})
+
+
+    def set_language(self, is_ja: bool) -> None:
+        self.commit({'t': 'lang', 'v': is_ja})
+
+
+    def add_mirror(self, channel_id: int) -> None:
+
+        if channel_id in self.mirrors:
+            return
+
+        if len(self.mirrors) >= _MIRROR_LIMIT:
+            raise TooManyMirrors
+
+        self.mirrors.append(channel_id)
+
+
+    def remove_mirror(self, channel_id: int) -> None:
+
+        if channel_id not in self.mirrors:
+            raise MirrorNotFound
+
+        self.mirrors.remove(channel_id)
+        self.mirror_messages.pop(channel_id, None)
+
+
+    def mirror_entries(self) -> list[Union[int, list[int]]]:
+        """Mirror channels for the token, with the id of the message each one shows once known."""
+        messages = {**self.mirror_messages, **MIRRORS.message_ids(self.id)}
+        return [[c, messages[c]] if c in messages else c for c in self.mirrors]
+
+
+    def restore(self, other: Mogi) -> None:
+        self.races = other.races
+        self.tags = other.tags
+        self.banner_users = other.banner_users
+        self.penalty = other.penalty
+        self.repick = other.repick
+        self.is_ja = other.is_ja
+        self.reset_total()
+
+
+    @archive_check
+    def undo(self, steps: int = 1) -> None:
+
+        if self.log is None:
+            raise NotUndoable
+
+        self.restore(self.log.undo(steps, Mogi))
+        self.prepare_card()
+
+
+    @archive_check
+    def redo(self, steps: int = 1) -> None:
+
+        if self.log is None:
+            raise NotRedoable
+
+        for event in self.log.redo(steps):
+            self.apply(event)
+
+        self.prepare_card()
+
 
     async def update_obs(self) -> None:
 
-        if not self.banner_users:
+        if not self.banner_users and self.id not in _OBS and not OVERLAY.enabled:
             return
 
         left: int = 12-len(self.races)
-        dif = self.total[0]-self.total[1]
+        dif = self.dif
         payload = {
             'teams': self.tags.copy(),
             'left': left,
-            'win': int(dif>left*40),
+            'win': int(dif>left*self.format.max_dif),
             'dif': '{:+}'.format(dif),
             'scores': self.total
         }
-        await update_sokuji(payload, self.banner_users.copy())
+
+        if self.is_duel:
+            payload['odds'] = {k: round(v, 4) for k, v in self.odds._asdict().items()}
+
+        if OVERLAY.enabled:
+            OVERLAY.publish(self.id, self.banner_users, payload)
+
+        if not self.banner_users and self.id not in _OBS:
+            return
+
+        last, previous, stored = _OBS.pop(self.id, (None, frozenset(), frozenset()))
+        users = frozenset(self.banner_users)
+        changed = payload != last
+        writes = 0
+
+        if changed:
+            stored = frozenset()
+        else:
+            _OBS_STATS.incr('unchanged')
+
+        # Users watching the overlay stream get nothing from Deta; they are written once they stop.
+        served = frozenset(u for u in users if OVERLAY.is_watched('sokuji', u))
+        targets = users - stored - served
+        _OBS_STATS.incr('served', len(served))
+
+        if users:
+            _OBS[self.id] = (payload, users, (stored & users) | targets)
+
+            if len(_OBS) > _OBS_LIMIT:
+                _OBS.popitem(last=False)
+
+        try:
+            if targets:
+                writes += await update_sokuji(payload, targets)
+
+            if previous - users:
+                writes += await clear_sokuji(previous - users)
+        except Exception:
+            _OBS.pop(self.id, None)
+
+            if self.message is not None:
+                self.forget(self.message.channel.id)
+            raise
+        finally:
+            _OBS_STATS.incr('updates')
+            _OBS_STATS.incr('writes', writes)
+            _OBS_STATS.observe('writes', writes)
+
         return
 
 
-    def make_result(self) -> File:
-        scores: list[list[int]] = [self.penalty.copy(), self.repick.copy()]
+    @property
+    def render_request(self) -> RenderRequest:
+        scores: list[tuple[int, ...]] = [tuple(self.penalty), tuple(self.repick)]
         track: Optional[Track] = None
 
         for race in self.races:
             scores.append(race.scores)
             track = track or race.track
 
-        return make(self.tags, scores, track.nick_en if track else None)
+        return RenderRequest(tuple(self.tags), tuple(scores), track.nick_en if track else None)
+
+
+    def prepare_card(self) -> None:
+        """Draw the graph of the first 11 races while the last one is played.
+
+        Started when race 11 lands and cancelled once an edit, removal or undo
+        changes those races or the penalties.
+        """
+        diffs: Optional[tuple[int, ...]] = None
+
+        if self.is_duel and len(self.races) in (11, 12):
+            diffs = tuple(s[0]-s[1] for s in self.render_request.scores[:13])
+
+        if self._card_prefix is not None and self._card_prefix != diffs:
+            RENDERER.discard(self._card_prefix)
+            self._card_prefix = None
+
+        if self._card_prefix is None and diffs is not None and len(self.races) == 11:
+            RENDERER.prepare(diffs)
+            self._card_prefix = diffs
+
+
+    async def make_card(self) -> Optional[bytes]:
+        if len(self.races) == 12 and self.is_duel:
+            return await RENDERER.render(self.render_request, self._card_prefix)
+
+        return None
+
+
+    def publish(self, embed: MyEmbed, card: Optional[bytes], repost: bool = False) -> None:
+        """Hand the state already rendered for this channel to the mirrors."""
+        if not self.mirrors:
+            MIRRORS.discard(self.id)
+            return
+
+        e = embed.copy()
+        e.set_footer(text=self.to_token(is_mirror=True))
+        MIRRORS.publish(self.id, self.mirrors, e, card, self.tags, repost, self.mirror_messages)
 
 
     async def send(
@@ -278,19 +738,29 @@ class Mogi:
 
         if content is not None:
             payload['content'] = content
-        e = self.embed.copy()
 
-        if len(self.races) == 12:
-            e.set_image(url='attachment://result.png')
-            payload['file'] = self.make_result()
+        try:
+            e = self.embed.copy()
 
-        payload['embed'] = e
-        message = await messageable.send(**payload)
+            if (card := await self.make_card()) is not None:
+                e.set_image(url='attachment://result.png')
+                payload['file'] = to_file(card, self.tags)
+
+            payload['embed'] = e
+            message = await messageable.send(**payload)
+        except BaseException:
+            self.forget(messageable.id)
+            raise
 
         if self.message is not None:
-            await self.message.delete()
+            try:
+                await self.message.delete()
+            except HTTPException:
+                # Already gone or not deletable; the new message takes over either way.
+                pass
 
         self.message = message
+        self.publish(e, card, repost=True)
         return
 
 
@@ -302,14 +772,33 @@ class Mogi:
 
         if content is not None:
             payload['content'] = content
-        e = self.embed.copy()
 
-        if len(self.races) == 12:
-            e.set_image(url='attachment://result.png')
-            payload['file'] = self.make_result()
+        try:
+            e = self.embed.copy()
+
+            if (card := await self.make_card()) is not None:
+                e.set_image(url='attachment://result.png')
+                payload['file'] = to_file(card, self.tags)
+
+            payload['embed'] = e
+            self.message = await self.message.edit(**payload)
+        except NotFound:
+            self.forget(self.message.channel.id)
+            raise MogiNotFound
+        except BaseException:
+            self.forget(self.message.channel.id)
+            raise
 
-        payload['embed'] = e
-        self.message = await self.message.edit(**payload)
+        self.publish(e, card)
+
+
+    def forget(self, channel_id: int) -> None:
+        """Drop the cached state of a channel after its message could not be updated.
+
+        The next command reads the state back from the message users last saw.
+        """
+        if _ACTIVE.get(channel_id) is self:
+            del _ACTIVE[channel_id]
 
 
     @staticmethod
@@ -318,9 +807,14 @@ class Mogi:
         e = MyEmbed(title="Banner URL")
 
         for user in banner_users:
+            value = f'> https://yumax-panda.github.io/sokuji-view/?user={user}'
+
+            if OVERLAY.enabled:
+                value += f'\n> Live: {OVERLAY.url(user)}'
+
             e.add_field(
                 name=f'__{user[:-4]}\'s URL__',
-                value=f'> https://yumax-panda.github.io/sokuji-view/?user={user}',
+                value=value,
                 inline=False
             )
 
@@ -70,10 +70,89 @@ class InvalidTag(MyError):
         )
 
 
+class InvalidTeam(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': '存在しないチーム番号です。'},
+            default='Invalid team number.'
+        )
+
+
+
+class NotDuel(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'この機能は2チームの即時(6v6)でのみ使えます。'},
+            default='This is only available for a sokuji between two teams (6v6).'
+        )
+
+
+
 class OutOfRange(MyError):
 
     def __init__(self) -> None:
         super().__init__(
             content={'ja': '存在しないレース番号です。'},
             default='Invalid race number.'
-        )
\ No newline at end of file
+        )
+
+
+class NotUndoable(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'これ以上元に戻せません。'},
+            default='Nothing to undo.'
+        )
+
+
+
+class NotRedoable(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'やり直せる操作がありません。'},
+            default='Nothing to redo.'
+        )
+
+
+
+class LogNotFound(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'この即時の記録が見つかりません。'},
+            default='History of this sokuji not found.'
+        )
+
+
+
+class InvalidMirror(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'ミラー先のチャンネルが見つからないか、送信権限がありません。'},
+            default='Channel not found, or you or the bot cannot send messages there.'
+        )
+
+
+
+class TooManyMirrors(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'これ以上ミラーを追加できません。'},
+            default='No more mirrors can be added.'
+        )
+
+
+
+class MirrorNotFound(MyError):
+
+    def __init__(self) -> None:
+        super().__init__(
+            content={'ja': 'このチャンネルはミラーされていません。'},
+            default='This channel is not mirrored.'
+        )
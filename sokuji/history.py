@@ -0,0 +1,197 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, Optional
+from collections.abc import Iterator
+import traceback
+import asyncio
+
+from .errors import *
+from common.utils import get_mogi_log, put_mogi_log
+from common.metrics import get_stats
+
+if TYPE_CHECKING:
+    from .components import Mogi
+
+
+_SNAPSHOT_INTERVAL = 8
+_STATS = get_stats('sokuji.history')
+
+
+class MogiLog:
+    """Append-only event log of a mogi with periodic snapshots.
+
+    ``snapshots`` maps an event count to the state token after that many
+    events, so any point of the history is rebuilt from the nearest snapshot
+    plus the events after it. ``head`` is the number of applied events;
+    undo moves it back and a new event drops everything after it.
+
+    It is stored as a head record and one chunk per snapshot holding the
+    snapshot and the events up to the next one, so a flush only writes the
+    head and the chunks changed since the last flush.
+    """
+
+    __slots__ = (
+        'mogi_id',
+        'events',
+        'snapshots',
+        'head',
+        '_stored',
+        '_dirty',
+        '_task'
+    )
+
+    def __init__(
+        self,
+        mogi_id: str,
+        events: Optional[list[dict]] = None,
+        snapshots: Optional[dict[int, str]] = None,
+        head: Optional[int] = None
+    ) -> None:
+        self.mogi_id: str = mogi_id
+        self.events: list[dict] = events if events is not None else []
+        self.snapshots: dict[int, str] = snapshots if snapshots is not None else {}
+        self.head: int = head if head is not None else len(self.events)
+        # Events already stored unchanged, -1 until the first write.
+        self._stored: int = -1
+        self._dirty: bool = False
+        self._task: Optional[asyncio.Task] = None
+
+
+    @staticmethod
+    def new(mogi: Mogi) -> MogiLog:
+        log = MogiLog(mogi.id, snapshots={0: mogi.to_token()})
+        log.schedule()
+        return log
+
+
+    @staticmethod
+    async def load(mogi_id: str) -> Optional[MogiLog]:
+        data = await get_mogi_log(mogi_id)
+
+        if not data:
+            return None
+
+        if 'events' in data:
+            # Written as a single document before logs were chunked; rewritten on the next flush.
+            return MogiLog(
+                mogi_id,
+                data['events'],
+                {int(k): v for k, v in data['snapshots'].items()},
+                data['head']
+            )
+
+        if any(c is None for c in data['chunks']):
+            # Part of it expired.
+            return None
+
+        log = MogiLog(
+            mogi_id,
+            [e for c in data['chunks'] for e in c['e']],
+            {i*_SNAPSHOT_INTERVAL: c['s'] for i, c in enumerate(data['chunks'])},
+            data['head']
+        )
+        log._stored = len(log.events)
+        return log
+
+
+    def chunk(self, index: int) -> dict:
+        start = index * _SNAPSHOT_INTERVAL
+        return {'s': self.snapshots[start], 'e': self.events[start:start+_SNAPSHOT_INTERVAL]}
+
+
+    @property
+    def can_undo(self) -> bool:
+        return self.head > 0
+
+    @property
+    def can_redo(self) -> bool:
+        return self.head < len(self.events)
+
+
+    def record(self, event: dict, mogi: Mogi) -> None:
+        """Append an event already applied to ``mogi``."""
+        if self.can_redo:
+            del self.events[self.head:]
+            self.snapshots = {k: v for k, v in self.snapshots.items() if k <= self.head}
+            self._stored = min(self._stored, self.head)
+
+        self.events.append(event)
+        self.head += 1
+        _STATS.incr('events')
+
+        if self.head % _SNAPSHOT_INTERVAL == 0:
+            self.snapshots[self.head] = mogi.to_token()
+            _STATS.incr('snapshots')
+
+        self.schedule()
+
+
+    def state_at(self, seq: int, cls: type[Mogi]) -> Mogi:
+        base = max(k for k in self.snapshots if k <= seq)
+        mogi = cls()
+        mogi.load_token(self.snapshots[base])
+
+        for event in self.events[base:seq]:
+            mogi.apply(event)
+
+        _STATS.incr('rebuilds')
+        _STATS.incr('rebuild_events', seq-base)
+        return mogi
+
+
+    def undo(self, steps: int, cls: type[Mogi]) -> Mogi:
+
+        if not self.can_undo:
+            raise NotUndoable
+
+        self.head -= min(steps, self.head)
+        _STATS.incr('undo')
+        self.schedule()
+        return self.state_at(self.head, cls)
+
+
+    def redo(self, steps: int) -> list[dict]:
+
+        if not self.can_redo:
+            raise NotRedoable
+
+        events = self.events[self.head:self.head+steps]
+        self.head += len(events)
+        _STATS.incr('redo')
+        self.schedule()
+        return events
+
+
+    def replay(self, cls: type[Mogi]) -> Iterator[tuple[Optional[dict], Mogi]]:
+        """Yield the state after every applied event, starting from the first snapshot."""
+        mogi = self.state_at(0, cls)
+        yield None, mogi
+
+        for event in self.events[:self.head]:
+            mogi.apply(event)
+            yield event, mogi
+
+
+    def schedule(self) -> None:
+        self._dirty = True
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._flush())
+
+
+    async def _flush(self) -> None:
+        while self._dirty:
+            self._dirty = False
+            # Every snapshot starts a chunk, including one with no events yet at the end.
+            count = len(self.events) // _SNAPSHOT_INTERVAL + 1
+            stored, self._stored = self._stored, len(self.events)
+            chunks = {} if stored == len(self.events) else {
+                i: self.chunk(i) for i in range(max(stored, 0) // _SNAPSHOT_INTERVAL, count)
+            }
+
+            try:
+                await put_mogi_log(self.mogi_id, {'head': self.head, 'chunks': count}, chunks)
+                _STATS.incr('flushes')
+                _STATS.incr('chunks_written', len(chunks))
+            except Exception:
+                traceback.print_exc()
+                self._stored = min(self._stored, stored)
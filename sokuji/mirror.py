@@ -0,0 +1,213 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING, NamedTuple, Optional
+from collections import OrderedDict
+import traceback
+import asyncio
+import time
+
+from discord import Forbidden, HTTPException, NotFound
+
+from .plotting import to_file
+from common.metrics import get_stats
+
+if TYPE_CHECKING:
+    from discord import Client, Embed, Message, PartialMessage
+
+
+_STATS = get_stats('sokuji.mirror')
+# Discord allows about 5 message edits per 5 seconds in one channel.
+_INTERVAL = 1.0
+_MAX_FAILURES = 3
+_MOGI_LIMIT = 64
+
+
+class Frame(NamedTuple):
+    """One rendered state of a mogi, shared by every mirror."""
+    embed: Embed
+    card: Optional[bytes]
+    tags: tuple[str, ...]
+    repost: bool
+    created: float
+
+
+class Destination:
+    """Delivery of one mogi to one mirror channel.
+
+    Only the newest undelivered frame is kept, so a channel that is slow or
+    rate limited skips intermediate states instead of queueing them. After a
+    restart, ``message_id`` from the token locates the message to edit.
+    """
+
+    __slots__ = (
+        'channel_id',
+        'message_id',
+        'message',
+        'failures',
+        '_pending',
+        '_task',
+        '_last'
+    )
+
+    def __init__(self, channel_id: int, message_id: Optional[int] = None) -> None:
+        self.channel_id: int = channel_id
+        self.message_id: Optional[int] = message_id
+        self.message: Optional[Message | PartialMessage] = None
+        self.failures: int = 0
+        self._pending: Optional[Frame] = None
+        self._task: Optional[asyncio.Task] = None
+        self._last: float = 0.0
+
+    @property
+    def is_dead(self) -> bool:
+        return self.failures >= _MAX_FAILURES
+
+    def push(self, client: Client, frame: Frame) -> None:
+        if self.is_dead:
+            return
+
+        if self._pending is not None:
+            _STATS.incr('coalesced')
+
+            # A skipped repost must still move the message to the bottom.
+            if self._pending.repost and not frame.repost:
+                frame = frame._replace(repost=True)
+
+        self._pending = frame
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(client))
+
+    def cancel(self) -> None:
+        self._pending = None
+
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self, client: Client) -> None:
+        while self._pending is not None and not self.is_dead:
+            wait = self._last + _INTERVAL - time.monotonic()
+
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            frame, self._pending = self._pending, None
+
+            try:
+                await self._deliver(client, frame)
+            except (Forbidden, NotFound):
+                self.failures = _MAX_FAILURES
+                _STATS.incr('lost')
+            except Exception:
+                traceback.print_exc()
+                self.failures += 1
+                _STATS.incr('failed')
+            else:
+                self.failures = 0
+                _STATS.incr('delivered')
+                _STATS.observe('latency', time.perf_counter()-frame.created)
+
+            self._last = time.monotonic()
+
+    async def _deliver(self, client: Client, frame: Frame) -> None:
+        payload = {'embed': frame.embed}
+
+        if frame.card is not None:
+            payload['file'] = to_file(frame.card, list(frame.tags))
+
+        channel = client.get_channel(self.channel_id) or await client.fetch_channel(self.channel_id)
+
+        if self.message is None and self.message_id is not None:
+            self.message = channel.get_partial_message(self.message_id)
+
+        if self.message is not None and not frame.repost:
+            try:
+                self.message = await self.message.edit(attachments=[], **payload)
+                return
+            except NotFound:
+                self.message = None
+
+        old, self.message = self.message, await channel.send(**payload)
+        self.message_id = self.message.id
+
+        if old is not None:
+            try:
+                await old.delete()
+            except HTTPException:
+                pass
+
+
+class MirrorHub:
+    """Fans the state of a mogi out to its mirror channels.
+
+    Every destination is delivered by its own task after the primary
+    channel has been updated, so a broken or rate limited mirror never
+    delays the primary channel or the other mirrors.
+    """
+
+    __slots__ = (
+        'client',
+        '_mogis'
+    )
+
+    def __init__(self) -> None:
+        self.client: Optional[Client] = None
+        self._mogis: OrderedDict[str, dict[int, Destination]] = OrderedDict()
+
+    def bind(self, client: Client) -> None:
+        self.client = client
+
+    def publish(
+        self,
+        mogi_id: str,
+        channel_ids: list[int],
+        embed: Embed,
+        card: Optional[bytes],
+        tags: list[str],
+        repost: bool = False,
+        messages: Optional[dict[int, int]] = None
+    ) -> None:
+        if self.client is None:
+            return
+
+        destinations = self._mogis.setdefault(mogi_id, {})
+        self._mogis.move_to_end(mogi_id)
+
+        for channel_id in set(destinations) - set(channel_ids):
+            destinations.pop(channel_id).cancel()
+
+        frame = Frame(embed, card, tuple(tags), repost, time.perf_counter())
+
+        messages = messages or {}
+
+        for channel_id in channel_ids:
+            if (destination := destinations.get(channel_id)) is None:
+                destination = destinations[channel_id] = Destination(channel_id, messages.get(channel_id))
+
+            destination.push(self.client, frame)
+
+        _STATS.incr('published')
+
+        while len(self._mogis) > _MOGI_LIMIT:
+            self._cancel(self._mogis.popitem(last=False)[1])
+
+    def discard(self, mogi_id: str) -> None:
+        self._cancel(self._mogis.pop(mogi_id, {}))
+
+    @staticmethod
+    def _cancel(destinations: dict[int, Destination]) -> None:
+        for destination in destinations.values():
+            destination.cancel()
+
+    def message_ids(self, mogi_id: str) -> dict[int, int]:
+        """Message each mirror of a mogi currently shows, by channel."""
+        return {
+            c: d.message_id for c, d in self._mogis.get(mogi_id, {}).items()
+            if d.message_id is not None
+        }
+
+    def dead(self, mogi_id: str) -> list[int]:
+        """Mirrors of a mogi that stopped receiving updates."""
+        return [c for c, d in self._mogis.get(mogi_id, {}).items() if d.is_dead]
+
+
+MIRRORS = MirrorHub()
@@ -0,0 +1,199 @@
+from __future__ import annotations
+from typing import Optional
+from collections import OrderedDict
+from urllib.parse import quote
+from aiohttp import web
+import hashlib
+import asyncio
+import json
+import os
+
+from common.metrics import get_stats
+
+
+_STATS = get_stats('sokuji.overlay')
+_HEARTBEAT = 15.0
+_DOCUMENT_LIMIT = 1024
+# Only the banner page may read payloads from another origin.
+_ORIGIN = os.environ.get('OVERLAY_ORIGIN', 'https://yumax-panda.github.io')
+_HEADERS = {
+    'Access-Control-Allow-Origin': _ORIGIN,
+    'Vary': 'Origin',
+    'Cache-Control': 'no-cache',
+}
+
+
+class Document:
+    """Latest overlay payload of a banner user or a mogi, with its live subscribers."""
+
+    __slots__ = (
+        'body',
+        'etag',
+        'subscribers'
+    )
+
+    def __init__(self) -> None:
+        self.body: Optional[bytes] = None
+        self.etag: Optional[str] = None
+        self.subscribers: set[asyncio.Queue] = set()
+
+    def update(self, body: bytes, etag: str) -> bool:
+        if etag == self.etag:
+            return False
+
+        self.body, self.etag = body, etag
+
+        for queue in self.subscribers:
+            # Latest wins: a subscriber that has not read the previous update skips it.
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait((body, etag))
+
+        return True
+
+
+class OverlayServer:
+    """Embedded HTTP server pushing OBS overlay payloads as they change.
+
+    Enabled by ``OVERLAY_PORT``. Payloads are served per banner user at
+    ``/sokuji/{user}`` and per mogi at ``/mogi/{id}``, as JSON with an ETag
+    for pollers, or as a Server-Sent Events stream under ``/events``.
+    Only published payloads have documents; anything else is a 404.
+
+    It listens on ``OVERLAY_HOST`` (loopback unless set) and is announced to
+    streamers under ``OVERLAY_URL``, for a proxy or a public address.
+    """
+
+    __slots__ = (
+        'port',
+        'host',
+        'base_url',
+        '_documents',
+        '_runner'
+    )
+
+    def __init__(self, port: Optional[int] = None, host: str = '127.0.0.1', base_url: Optional[str] = None) -> None:
+        self.port: Optional[int] = port
+        self.host: str = host
+        self.base_url: str = (base_url or f'http://localhost:{port}').rstrip('/')
+        self._documents: OrderedDict[tuple[str, str], Document] = OrderedDict()
+        self._runner: Optional[web.AppRunner] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.port is not None
+
+    def url(self, user_id: str) -> str:
+        return f'{self.base_url}/sokuji/{quote(user_id)}/events'
+
+    def is_watched(self, kind: str, key: str) -> bool:
+        """Whether a live subscriber receives this document."""
+        doc = self._documents.get((kind, key))
+        return doc is not None and bool(doc.subscribers)
+
+    def document(self, kind: str, key: str) -> Document:
+        try:
+            self._documents.move_to_end((kind, key))
+            return self._documents[(kind, key)]
+        except KeyError:
+            pass
+
+        doc = self._documents[(kind, key)] = Document()
+
+        while len(self._documents) > _DOCUMENT_LIMIT:
+            for k, d in self._documents.items():
+                if not d.subscribers:
+                    del self._documents[k]
+                    break
+            else:
+                break
+
+        return doc
+
+    def publish(self, mogi_id: str, user_ids: set[str], payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode()
+        etag = hashlib.blake2b(body, digest_size=8).hexdigest()
+        _STATS.incr('published')
+
+        for kind, key in (('mogi', mogi_id), *(('sokuji', u) for u in user_ids)):
+            if not self.document(kind, key).update(body, etag):
+                _STATS.incr('unchanged')
+
+    async def start(self) -> None:
+        if not self.enabled or self._runner is not None:
+            return
+
+        app = web.Application()
+        app.add_routes([
+            web.get('/{kind:sokuji|mogi}/{key}', self.get),
+            web.get('/{kind:sokuji|mogi}/{key}/events', self.events),
+        ])
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def get(self, request: web.Request) -> web.StreamResponse:
+        doc = self._documents.get((request.match_info['kind'], request.match_info['key']))
+
+        if doc is None or doc.body is None:
+            raise web.HTTPNotFound(headers=_HEADERS)
+
+        headers = {**_HEADERS, 'ETag': f'"{doc.etag}"'}
+        tags = {t.strip().removeprefix('W/').strip('"') for t in request.headers.get('If-None-Match', '').split(',')}
+
+        if doc.etag in tags or '*' in tags:
+            _STATS.incr('not_modified')
+            return web.Response(status=304, headers=headers)
+
+        _STATS.incr('served')
+        return web.Response(body=doc.body, content_type='application/json', headers=headers)
+
+    async def events(self, request: web.Request) -> web.StreamResponse:
+        doc = self._documents.get((request.match_info['kind'], request.match_info['key']))
+
+        if doc is None:
+            raise web.HTTPNotFound(headers=_HEADERS)
+
+        queue: asyncio.Queue = asyncio.Queue(maxsize=1)
+
+        if doc.body is not None and request.headers.get('Last-Event-ID') != doc.etag:
+            queue.put_nowait((doc.body, doc.etag))
+
+        response = web.StreamResponse(headers={
+            **_HEADERS,
+            'Content-Type': 'text/event-stream',
+            'X-Accel-Buffering': 'no',
+        })
+        await response.prepare(request)
+        doc.subscribers.add(queue)
+        _STATS.counters['subscribers'] = _STATS.counters.get('subscribers', 0) + 1
+
+        try:
+            while True:
+                try:
+                    body, etag = await asyncio.wait_for(queue.get(), _HEARTBEAT)
+                except asyncio.TimeoutError:
+                    await response.write(b': ping\n\n')
+                    continue
+
+                await response.write(b'id: %s\ndata: %s\n\n' % (etag.encode(), body))
+                _STATS.incr('pushed')
+        except ConnectionResetError:
+            pass
+        finally:
+            doc.subscribers.discard(queue)
+            _STATS.counters['subscribers'] -= 1
+
+        return response
+
+
+OVERLAY = OverlayServer(
+    int(os.environ['OVERLAY_PORT']) if os.environ.get('OVERLAY_PORT') else None,
+    os.environ.get('OVERLAY_HOST', '127.0.0.1'),
+    os.environ.get('OVERLAY_URL')
+)
@@ -1,24 +1,82 @@
 from typing import Optional
+from collections import OrderedDict
 from PIL import Image, ImageDraw, ImageFont
 from discord import File
 from io import BytesIO
-import matplotlib.pyplot as plt
 import numpy as np
 
+from common import charts
 
-BOLD = ImageFont.truetype('fonts/NotoSansCJKjp-Bold.otf', size=80)
-THIN = ImageFont.truetype('fonts/NotoSansCJKjp-Thin.otf', size=50)
-FIRST = Image.open('images/first.png')
-SECOND = Image.open('images/second.png')
 
+def _load_assets() -> None:
+    global BOLD, THIN, FIRST, SECOND
+    BOLD = ImageFont.truetype('fonts/NotoSansCJKjp-Bold.otf', size=80)
+    THIN = ImageFont.truetype('fonts/NotoSansCJKjp-Thin.otf', size=50)
+    FIRST = Image.open('images/first.png')
+    SECOND = Image.open('images/second.png')
+    FIRST.load()
+    SECOND.load()
 
-def make(
-    tags: list[str],
-    score_history: list[list[int]],
-    track_name: Optional[str] = None
-) -> File:
-    scores = np.array(score_history).sum(axis=0)
-    diff_history = np.array([s[0]-s[1] for s in score_history]).cumsum()[-13:]
+
+# Bump whenever the card layout changes so cached cards are not reused.
+VERSION = 3
+# Encoding dominates a card with a track background: level 1 takes about 90ms
+# against 430ms for the default 6, for a file about 16% larger.
+_COMPRESS_LEVEL = 1
+
+_load_assets()
+_WIDTH, _HEIGHT = 1280, 720
+# A cached background saves about 30ms of a 135ms track card, at 2.6MB (3.5MB
+# without a track) per entry and worker. Repeated renders are corrections to
+# the same finished mogi, so two entries cover them.
+_BASE_LIMIT = 2
+_BASES: OrderedDict[tuple[Optional[str], bool], Image.Image] = OrderedDict()
+# Graph of a card drawn before its last race, as a crop and its offset.
+Prefix = tuple[Image.Image, tuple[int, int]]
+
+
+def _base(track_name: Optional[str], is_draw: bool) -> Image.Image:
+    """Background at card size with the bars and badges already drawn.
+
+    Built on first use and kept in a small LRU.
+    """
+    key = (track_name, is_draw)
+
+    try:
+        _BASES.move_to_end(key)
+        return _BASES[key]
+    except KeyError:
+        pass
+
+    if track_name is None:
+        img = Image.new('RGBA', (_WIDTH, _HEIGHT), '#2c3e50')
+    else:
+        with Image.open(f'images/{track_name}.png') as src:
+            img = src.resize((_WIDTH, _HEIGHT))
+
+    img.paste(FIRST, (10,165), FIRST)
+    draw = ImageDraw.Draw(img)
+    draw.line([(0, 0), (_WIDTH, 0)], fill = '#afeeee', width = 40)
+    draw.line([(0, _HEIGHT), (_WIDTH, _HEIGHT)], fill = '#afeeee', width = 40)
+    badge = FIRST if is_draw else SECOND
+    img.paste(badge, (10, 310), badge)
+
+    _BASES[key] = img
+
+    if len(_BASES) > _BASE_LIMIT:
+        _BASES.popitem(last=False)
+
+    return img
+
+
+def warm() -> None:
+    """Reopen assets so a forked worker does not share file offsets with its
+    parent, then render a throwaway card to fill the font caches."""
+    _load_assets()
+    render(['A', 'B'], [[0, 0], [0, 0], [40, -40], [-40, 40]])
+
+
+def _ticks(diff_history: np.ndarray) -> list[int]:
     min_diff = diff_history.min()
     max_diff = diff_history.max()
 
@@ -27,48 +85,46 @@ def make(
     else:
         y = [min_diff, (min_diff+max_diff)//2, max_diff]
 
-    fig = plt.figure(figsize=(12.8, 3))
-    fig.subplots_adjust(0.125, 0.1, 0.9, 0.85)
-    ax = fig.add_subplot(111, xmargin=0, xticks=[], yticks=y)
-    ax.tick_params(labelsize = 20)
-    ax.grid(axis='y', color='#fffafa')
-    ax.axhspan(min_diff, max_diff, color='grey', alpha=0.3)
-    if min_diff <= 0 and max_diff >= 0:
-        ax.plot([0]*len(diff_history), color='#fffafa')
-    ax.plot(diff_history, color='#6495ed', linewidth=4)
-    ax.spines['top'].set_visible(False)
-    ax.spines['right'].set_visible(False)
-    ax.spines['bottom'].set_visible(False)
-    ax.spines['left'].set_visible(False)
-    ax.tick_params(axis='y', colors='#fffafa')
-    buffer = BytesIO()
-    fig.savefig(buffer, format='png', transparent=True)
-    ax.cla()
-    fig.clf()
-    plt.clf()
-    plt.close()
-    buffer.seek(0)
-    graph_img = Image.open(buffer)
-
-    width, height = graph_img.size
-    back_width = width
-    back_height = height + 420
+    return [int(v) for v in y]
 
-    if track_name is None:
-        back_img = Image.new(graph_img.mode, (back_width, back_height), '#2c3e50')
-    else:
-        back_img = Image.open(f'images/{track_name}.png').copy().resize((back_width, back_height))
 
+def graph(diffs: list[int], prefix: Optional[Prefix] = None) -> Image.Image:
+    """Transparent layer of the cumulative difference line.
+
+    ``prefix`` is drawn by :func:`graph_prefix` for all but the last diff.
+    It is finished with the last segment when that stays within the range
+    already drawn, and ignored otherwise.
+    """
+    diff_history = np.array(diffs).cumsum()[-13:]
+
+    if prefix is not None and len(diff_history) > 1 and diff_history[:-1].min() <= diff_history[-1] <= diff_history[:-1].max():
+        return charts.finish_diff_chart(*prefix, diff_history.tolist())
+
+    return charts.diff_chart(diff_history.tolist(), _ticks(diff_history))
+
+
+def graph_prefix(diffs: list[int]) -> Prefix:
+    """:func:`graph` of ``diffs`` laid out for one more diff to come.
+
+    Cropped to what is drawn, with its offset, as it is passed between processes.
+    """
+    diff_history = np.array(diffs).cumsum()[-12:]
+    layer = charts.diff_chart(diff_history.tolist(), _ticks(diff_history), len(diff_history)+1)
+    box = layer.getbbox()
+    return layer.crop(box), box[:2]
+
+
+def compose(
+    tags: list[str],
+    score_history: list[list[int]],
+    track_name: Optional[str],
+    graph_img: Image.Image
+) -> bytes:
+    scores = np.array(score_history).sum(axis=0)
+    back_img = _base(track_name, scores[0] == scores[1]).copy()
+    back_width = back_img.width
     back_img.paste(graph_img, (0, 420), graph_img)
-    back_img.paste(FIRST, (10,165), FIRST)
     draw = ImageDraw.Draw(back_img)
-    draw.line([(0, 0), (back_width, 0)], fill = '#afeeee', width = 40)
-    draw.line([(0, back_height), (back_width, back_height)], fill = '#afeeee', width = 40)
-
-    if scores[0] != scores[1]:
-        back_img.paste(SECOND, (10,310), SECOND)
-    else:
-        back_img.paste(FIRST, (10, 310), FIRST)
 
     first_index = int(scores[0] < scores[1])
     second_index = int(int(scores[0] >= scores[1]))
@@ -79,9 +135,26 @@ def make(
     draw.text((back_width-300, 300), str(scores[second_index]), fill='#F8F8FF', font=BOLD)
     draw.text((back_img.width-260, 250), '({:+})'.format(abs(scores[0]-scores[1])), fill='#F8F8FF', font=THIN)
     b = BytesIO()
-    back_img.save(b, 'png')
-    b.seek(0)
-    file = File(fp=b, filename='result.png', description=' '.join(tags))
-    buffer.close()
-    b.close()
-    return file
\ No newline at end of file
+    back_img.save(b, 'png', compress_level=_COMPRESS_LEVEL)
+    return b.getvalue()
+
+
+def render(
+    tags: list[str],
+    score_history: list[list[int]],
+    track_name: Optional[str] = None,
+    prefix: Optional[Prefix] = None
+) -> bytes:
+    return compose(tags, score_history, track_name, graph([s[0]-s[1] for s in score_history], prefix))
+
+
+def make(
+    tags: list[str],
+    score_history: list[list[int]],
+    track_name: Optional[str] = None
+) -> File:
+    return to_file(render(tags, score_history, track_name), tags)
+
+
+def to_file(data: bytes, tags: list[str]) -> File:
+    return File(fp=BytesIO(data), filename='result.png', description=' '.join(tags))
\ No newline at end of file
@@ -0,0 +1,64 @@
+from __future__ import annotations
+from typing import NamedTuple
+import numpy as np
+
+from objects.rank import PLACEMENTS
+
+
+_RACES = 12
+_MAX_DIF = max(p.dif for p in PLACEMENTS.values())
+_OFFSET = _RACES * _MAX_DIF // 2
+
+
+def _build() -> np.ndarray:
+    """Cumulative distribution of the summed difference over ``k`` races.
+
+    Row ``k`` holds P(S <= 2*(j-_OFFSET)) in column ``j``, where S is the sum
+    of ``k`` per-race differences and every one of the 924 placements is
+    equally likely.
+    """
+    pmf = np.zeros(_MAX_DIF + 1)
+
+    for p in PLACEMENTS.values():
+        pmf[(p.dif + _MAX_DIF) // 2] += 1
+
+    pmf /= pmf.sum()
+    table = np.zeros((_RACES + 1, 2*_OFFSET + 1))
+    dist = np.ones(1)
+
+    for k in range(_RACES + 1):
+        start = _OFFSET - k*_MAX_DIF//2
+        table[k, start:start+len(dist)] = dist.cumsum()
+        table[k, start+len(dist):] = 1.0
+        dist = np.convolve(dist, pmf)
+
+    return table
+
+
+_CDF = _build()
+
+
+class Odds(NamedTuple):
+    win: float
+    draw: float
+    lose: float
+
+
+def _at_most(left: int, value: int) -> float:
+    j = value // 2 + _OFFSET
+
+    if j < 0:
+        return 0.0
+
+    if j > 2*_OFFSET:
+        return 1.0
+
+    return float(_CDF[left, j])
+
+
+def odds(dif: int, left: int) -> Odds:
+    """Win/draw/lose probability with ``dif`` points ahead and ``left`` races to go."""
+    left = min(max(left, 0), _RACES)
+    lose = _at_most(left, -dif-1)
+    not_win = _at_most(left, -dif)
+    return Odds(1.0-not_win, not_win-lose, lose)
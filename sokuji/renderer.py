@@ -0,0 +1,213 @@
+from __future__ import annotations
+from typing import Any, Callable, NamedTuple, Optional
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import multiprocessing
+import hashlib
+import asyncio
+import json
+import time
+
+from . import plotting
+from common.metrics import get_stats
+
+
+_STATS = get_stats('sokuji.renderer')
+_CARD_STATS = get_stats('sokuji.cards')
+
+
+class RenderRequest(NamedTuple):
+    tags: tuple[str, ...]
+    scores: tuple[tuple[int, ...], ...]
+    track: Optional[str] = None
+
+
+def _render(request: RenderRequest, prefix: Optional[plotting.Prefix] = None) -> tuple[bytes, float]:
+    start = time.perf_counter()
+    data = plotting.render(list(request.tags), [list(s) for s in request.scores], request.track, prefix)
+    return data, time.perf_counter()-start
+
+
+def _prefix(diffs: tuple[int, ...]) -> tuple[plotting.Prefix, float]:
+    start = time.perf_counter()
+    layer = plotting.graph_prefix(list(diffs))
+    return layer, time.perf_counter()-start
+
+
+class CardCache:
+    """Rendered cards keyed by a hash of their inputs, evicted LRU by total bytes."""
+
+    __slots__ = (
+        'max_bytes',
+        'size',
+        '_cards'
+    )
+
+    def __init__(self, max_bytes: int = 32 << 20) -> None:
+        self.max_bytes: int = max_bytes
+        self.size: int = 0
+        self._cards: OrderedDict[str, bytes] = OrderedDict()
+
+    @staticmethod
+    def key(request: RenderRequest) -> str:
+        payload = json.dumps([plotting.VERSION, *request], ensure_ascii=False, separators=(',', ':'))
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        try:
+            self._cards.move_to_end(key)
+            data = self._cards[key]
+        except KeyError:
+            _CARD_STATS.incr('miss')
+            return None
+
+        _CARD_STATS.incr('hit')
+        _CARD_STATS.incr('bytes_saved', len(data))
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes or key in self._cards:
+            return
+
+        self._cards[key] = data
+        self.size += len(data)
+
+        while self.size > self.max_bytes:
+            _, old = self._cards.popitem(last=False)
+            self.size -= len(old)
+            _CARD_STATS.incr('evicted')
+
+        _CARD_STATS.counters['bytes'] = self.size
+        _CARD_STATS.counters['entries'] = len(self._cards)
+
+
+class Renderer:
+    """Pool of warm worker processes drawing result cards off the event loop.
+
+    Workers are forked with fonts and images already loaded.
+    At most ``max_pending`` jobs are in flight; further callers wait.
+    Graphs prepared ahead of a last race are kept for the latest
+    ``max_prefixes`` mogis, about 1MB each.
+    """
+
+    __slots__ = (
+        'workers',
+        'max_pending',
+        'max_prefixes',
+        'cache',
+        '_pool',
+        '_semaphore',
+        '_prefixes'
+    )
+
+    def __init__(self, workers: int = 2, max_pending: int = 8, max_prefixes: int = 32) -> None:
+        self.workers: int = workers
+        self.max_pending: int = max_pending
+        self.max_prefixes: int = max_prefixes
+        self.cache: CardCache = CardCache()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._prefixes: OrderedDict[tuple[int, ...], asyncio.Task] = OrderedDict()
+
+    def start(self) -> None:
+        """Start the workers. Call before the gateway connects so they fork from a quiet process."""
+        if self._pool is not None:
+            return
+
+        methods = multiprocessing.get_all_start_methods()
+        self._pool = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context('fork' if 'fork' in methods else 'spawn'),
+            initializer=plotting.warm
+        )
+
+        for _ in range(self.workers):
+            self._pool.submit(time.perf_counter)
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    async def _run(self, func: Callable[..., Any], *args: Any) -> Any:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_pending)
+
+        queued = time.perf_counter()
+
+        async with self._semaphore:
+            _STATS.observe('wait', time.perf_counter()-queued)
+            self.start()
+            loop = asyncio.get_running_loop()
+
+            try:
+                return await loop.run_in_executor(self._pool, func, *args)
+            except BrokenProcessPool:
+                _STATS.incr('restarts')
+                self.shutdown()
+                self.start()
+                return await loop.run_in_executor(self._pool, func, *args)
+
+    def prepare(self, diffs: tuple[int, ...]) -> None:
+        """Start drawing the graph of a card whose last diff is still to come.
+
+        :meth:`render` finishes it when passed the same ``diffs``. Does nothing
+        outside an event loop.
+        """
+        if diffs in self._prefixes:
+            self._prefixes.move_to_end(diffs)
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+
+        self._prefixes[diffs] = loop.create_task(self._prefix(diffs))
+
+        while len(self._prefixes) > self.max_prefixes:
+            _, task = self._prefixes.popitem(last=False)
+            task.cancel()
+
+    def discard(self, diffs: tuple[int, ...]) -> None:
+        """Cancel or drop the graph prepared for ``diffs``."""
+        if (task := self._prefixes.pop(diffs, None)) is not None:
+            task.cancel()
+
+    async def _prefix(self, diffs: tuple[int, ...]) -> plotting.Prefix:
+        layer, elapsed = await self._run(_prefix, diffs)
+        _STATS.incr('prefixes')
+        _STATS.observe('prefix', elapsed)
+        return layer
+
+    async def render(self, request: RenderRequest, prefix: Optional[tuple[int, ...]] = None) -> bytes:
+        """Card for ``request``, finished from the graph prepared for ``prefix``, the
+        diffs of all but its last race, when there is one."""
+        key = CardCache.key(request)
+
+        if (data := self.cache.get(key)) is not None:
+            return data
+
+        start = time.perf_counter()
+        layer: Optional[plotting.Prefix] = None
+
+        if prefix is not None and (task := self._prefixes.get(prefix)) is not None:
+            try:
+                # Shielded so that a cancelled render leaves the layer to the next one.
+                layer = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+            except Exception:
+                _STATS.incr('prefix_errors')
+
+        data, elapsed = await self._run(_render, request, layer)
+        _STATS.incr('renders')
+        _STATS.observe('render', elapsed)
+        _STATS.observe('total', time.perf_counter()-start)
+        self.cache.put(key, data)
+        return data
+
+
+RENDERER = Renderer()
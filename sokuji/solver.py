@@ -0,0 +1,96 @@
+from __future__ import annotations
+from typing import NamedTuple, Optional
+from collections.abc import Iterable
+
+from objects.rank import PLACEMENTS
+
+
+_RACES = 12
+_MAX_DIF = max(p.dif for p in PLACEMENTS.values())
+
+_BY_DIF: dict[int, tuple[str, ...]] = {
+    dif: tuple(p.text for _, p in sorted(
+        ((tuple(map(int, p.text.split(','))), p) for p in PLACEMENTS.values() if p.dif == dif)
+    ))
+    for dif in range(-_MAX_DIF, _MAX_DIF+1, 2)
+}
+_AT_LEAST: dict[int, int] = {
+    dif: sum(len(_BY_DIF[d]) for d in range(dif, _MAX_DIF+1, 2))
+    for dif in _BY_DIF
+}
+
+
+class Clinch(NamedTuple):
+    dif: int
+    left: int
+    result: int
+    locked: Optional[int]
+    need: Optional[int]
+    earliest: Optional[int]
+
+    @property
+    def patterns(self) -> tuple[str, ...]:
+        """Weakest placements that still reach ``need``."""
+        return _BY_DIF.get(self.need, ())
+
+    @property
+    def count(self) -> int:
+        """Number of placements reaching ``need`` in a single race."""
+        return _AT_LEAST.get(self.need, 0)
+
+
+def _locked(dif: int, left: int) -> int:
+
+    if dif > _MAX_DIF*left:
+        return 1
+
+    if dif < -_MAX_DIF*left:
+        return -1
+
+    return 0
+
+
+def required(dif: int, left: int) -> Optional[int]:
+    """Smallest per-race difference that wins when reached in every remaining race."""
+
+    if left <= 0:
+        return None
+
+    need = -dif//left + 1
+    need += need % 2
+
+    if need > _MAX_DIF:
+        return None
+
+    return max(need, -_MAX_DIF)
+
+
+def earliest(dif: int, played: int) -> Optional[int]:
+    """Earliest race after which a win is locked if every race from now is a full sweep."""
+    left = _RACES - played
+
+    if dif + _MAX_DIF*left <= 0:
+        return None
+
+    return played + max((_MAX_DIF*left - dif)//(2*_MAX_DIF) + 1, 0)
+
+
+def solve(difs: Iterable[int], offset: int = 0) -> Clinch:
+    """Solve for a mogi given per-race differences and the penalty/repick difference."""
+    dif = offset
+    played = 0
+    result = _locked(dif, _RACES)
+    locked: Optional[int] = None
+
+    for played, d in enumerate(difs, 1):
+        dif += d
+
+        if not result and (result := _locked(dif, _RACES-played)):
+            locked = played
+
+    left = _RACES - played
+
+    if result:
+        return Clinch(dif, left, result, locked, None, None)
+
+    return Clinch(dif, left, 0, None, required(dif, left), earliest(dif, played))
@@ -0,0 +1,119 @@
+from __future__ import annotations
+from typing import TYPE_CHECKING
+from collections import deque
+from contextlib import asynccontextmanager
+import traceback
+import asyncio
+
+from .errors import *
+from .classifier import InputKind
+from .components import Mogi
+from objects import Track
+from common.metrics import get_stats
+
+if TYPE_CHECKING:
+    from collections.abc import AsyncIterator
+    from discord import Message
+    from discord.abc import Messageable
+
+
+_STATS = get_stats('sokuji.updater')
+
+
+class ChannelUpdater:
+    """Per-channel actor applying sokuji input in arrival order.
+
+    Messages typed at the same time are drained as one batch, so a batch
+    costs a single registry lookup, OBS update and embed send no matter
+    how many inputs it holds. Commands that mutate a mogi take the same
+    per-channel lock, so they never interleave with a batch. A channel's
+    queue and lock are dropped as soon as nothing uses them.
+    """
+
+    __slots__ = (
+        '_queues',
+        '_locks',
+        '_holders',
+        '_workers'
+    )
+
+    def __init__(self) -> None:
+        self._queues: dict[int, deque[tuple[InputKind, str]]] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        self._holders: dict[int, int] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+
+    @asynccontextmanager
+    async def lock(self, channel_id: int) -> AsyncIterator[None]:
+        lock = self._locks.setdefault(channel_id, asyncio.Lock())
+        self._holders[channel_id] = self._holders.get(channel_id, 0) + 1
+
+        try:
+            async with lock:
+                yield
+        finally:
+            # Counts waiters too, so the lock is never replaced while someone waits for it.
+            if (holders := self._holders[channel_id] - 1):
+                self._holders[channel_id] = holders
+            else:
+                del self._holders[channel_id]
+                del self._locks[channel_id]
+
+    def put(self, message: Message, kind: InputKind) -> None:
+        channel_id = message.channel.id
+        self._queues.setdefault(channel_id, deque()).append((kind, message.content))
+        _STATS.incr('queued')
+
+        if channel_id not in self._workers:
+            self._workers[channel_id] = asyncio.create_task(self._run(message.channel))
+
+    async def _run(self, channel: Messageable) -> None:
+        queue = self._queues[channel.id]
+
+        try:
+            while queue:
+                async with self.lock(channel.id):
+                    batch = list(queue)
+                    queue.clear()
+
+                    try:
+                        await self._apply(channel, batch)
+                    except Exception:
+                        traceback.print_exc()
+        finally:
+            del self._workers[channel.id]
+
+            if not queue:
+                del self._queues[channel.id]
+
+    @staticmethod
+    async def _apply(channel: Messageable, batch: list[tuple[InputKind, str]]) -> None:
+        _STATS.incr('batches')
+
+        try:
+            sokuji = await Mogi.get(channel)
+        except (MogiNotFound, MogiArchived):
+            return
+
+        changed = 0
+
+        for kind, content in batch:
+            try:
+                if kind is InputKind.TRACK:
+                    sokuji.loaded_track = Track.from_nick(content)
+                elif kind is InputKind.BACK:
+                    sokuji.pop_race()
+                    changed += 1
+                else:
+                    sokuji.push_race(content)
+                    changed += 1
+            except (MogiArchived, NotAddable, NotBackable, InvalidRankInput, OutOfRange):
+                continue
+
+        if not changed:
+            return
+
+        _STATS.incr('applied', changed)
+        _STATS.incr('sends')
+        await sokuji.update_obs()
+        await sokuji.send(channel)
@@ -10,7 +10,7 @@ from math import isnan
 import pandas as pd
 
 from common import MyEmbed, LoungeEmbed, get_team_name, set_team_name, get_dt
-from objects import get_players_by_ids, PlayerLike, from_records
+from objects import get_players_by_ids, PlayerLike, from_records, LEADERBOARD, Distribution
 
 from .components import Vote
 from .errors import *
@@ -104,15 +104,16 @@ class Team(commands.Cog, name='Team'):
             raise PlayerNotFound
 
         count = 0
-        header= f'**Role**  {role.mention}\n'
+        header= f'**Role**  {role.mention}\n' + LEADERBOARD.mmr.top_line(average)
         content = commands.Paginator(prefix='', suffix='')
+        positions = LEADERBOARD.mmr.position(df['mmr'].to_numpy(dtype=float))
 
-        for player in from_records(df.to_dict('records')):
+        for player, position in zip(from_records(df.to_dict('records')), positions):
             if player.is_placement:
                 continue
             else:
                 count += 1
-                content.add_line(f'{str(count).rjust(3)}: [{player.name}]({player.lounge_url}) ({int(player.mmr)})')
+                content.add_line(f'{str(count).rjust(3)}: [{player.name}]({player.lounge_url}) ({Distribution.with_position(player.mmr, position)})')
 
         embeds = [LoungeEmbed(
             mmr=average,
@@ -0,0 +1,11 @@
+"""Run from the bot's working directory, where sokuji.plotting finds fonts/ and images/.
+
+    python -m pytest tests
+"""
+import os
+
+# common.utils opens its Deta client on import; tests never reach the database.
+os.environ.setdefault('DB_KEY', 'test_key')
+
+# sokuji and objects import each other, and only resolve when sokuji comes first.
+import sokuji  # noqa: E402,F401
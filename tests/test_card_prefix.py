@@ -0,0 +1,64 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from sokuji import components, plotting
+from sokuji.components import Mogi
+from sokuji.renderer import Renderer
+
+
+RACES = ('123456', '1-4+', '-3 12', '0+12', '135789', '2468+', '1-6', '-5 12', '12+', '3-8', '1357+')
+
+
+def test_prefix_finishes_to_the_full_graph() -> None:
+    diffs = [0, 0, 20, -6, 8, -2, 4, 14, -10, 2, 6, -4, 10, -8]
+    full = np.asarray(plotting.graph(diffs), int)
+    finished = np.asarray(plotting.graph(diffs, plotting.graph_prefix(diffs[:-1])), int)
+    # Only antialiased pixels where the last segment joins the line may differ.
+    assert (np.abs(full-finished).max(axis=2) > 4).sum() < 20
+
+
+def test_prefix_is_ignored_outside_its_range() -> None:
+    diffs = [0, 0, 20, -6, 8, -2, 4, 14, -10, 2, 6, -4, 10, 40]
+    prefix = plotting.graph_prefix(diffs[:-1])
+    assert plotting.graph(diffs, prefix).tobytes() == plotting.graph(diffs).tobytes()
+
+
+def test_prefix_follows_the_first_11_races(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def draw(self, diffs: tuple[int, ...]) -> None:
+        await asyncio.sleep(3600)
+
+    monkeypatch.setattr(Renderer, '_prefix', draw)
+    renderer = Renderer()
+    monkeypatch.setattr(components, 'RENDERER', renderer)
+
+    async def main() -> None:
+        mogi = Mogi(tags=['A', 'B'])
+        mogi.open_log()
+
+        for ranks in RACES[:10]:
+            mogi.push_race(ranks)
+
+        assert not renderer._prefixes
+        mogi.push_race(RACES[10])
+        first = mogi._card_prefix
+        task = renderer._prefixes[first]
+        mogi.push_race('123456')
+        mogi.pop_race()
+        assert list(renderer._prefixes) == [first] and renderer._prefixes[first] is task
+
+        mogi.set_race(3, mogi.races[0])
+        await asyncio.sleep(0)
+        assert task.cancelled() and list(renderer._prefixes) == [mogi._card_prefix] != [first]
+
+        task = renderer._prefixes[mogi._card_prefix]
+        mogi.undo()
+        await asyncio.sleep(0)
+        assert task.cancelled() and list(renderer._prefixes) == [first] == [mogi._card_prefix]
+
+        mogi.pop_race()
+        assert mogi._card_prefix is None and not renderer._prefixes
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}), return_exceptions=True)
+
+    asyncio.run(main())
@@ -0,0 +1,33 @@
+import numpy as np
+
+from objects import Distribution
+
+
+def test_position_counts_players_strictly_above() -> None:
+    d = Distribution(np.array([-1, 100, 200, 200, 300, -1]))
+
+    assert len(d) == 4
+    assert d.position([300, 250, 200, 100, 50, 1000]).tolist() == [1, 2, 2, 4, 5, 1]
+    assert d.position([float('nan')]).tolist() == [0]
+
+
+def test_top_follows_position() -> None:
+    d = Distribution(np.arange(1, 201))
+
+    assert float(d.top(200)) == 0.5
+    assert float(d.top(101)) == 50.0
+    assert d.label(101) == '50% (#100 / 200)'
+    assert d.top_line(101) == '**Top**  50% (#100 / 200)\n'
+
+
+def test_empty_distribution() -> None:
+    d = Distribution(np.empty(0))
+
+    assert d.position([1.0]).tolist() == [0]
+    assert d.label(5) is None
+    assert d.top_line(5) == ''
+
+
+def test_with_position() -> None:
+    assert Distribution.with_position(5000.0, 12) == '5000, #12'
+    assert Distribution.with_position(5000.0, 0) == '5000'
@@ -0,0 +1,251 @@
+import asyncio
+import json
+
+import pytest
+
+from common import utils
+from sokuji import history
+from sokuji.components import Mogi
+from sokuji.errors import NotRedoable
+
+
+RACES = ('123456', '1-4+', '-3 12', '0+12', '135789', '2468+', '1-6', '-5 12', '12+', '3-8')
+
+
+class FakeBase:
+
+    def __init__(self, documents: dict[str, dict], writes: list[str]) -> None:
+        self.documents = documents
+        self.writes = writes
+
+    async def get(self, key: str):
+        return self.documents.get(key)
+
+    async def put_many(self, items: list[dict], expire_in: int = None) -> None:
+        assert expire_in == utils.MOGI_LOG_EXPIRY
+
+        for item in items:
+            self.documents[item['key']] = item
+            self.writes.append(item['key'])
+
+    async def close(self) -> None:
+        pass
+
+
+class FakeDeta:
+
+    def __init__(self) -> None:
+        self.documents: dict[str, dict] = {}
+        self.writes: list[str] = []
+
+    def AsyncBase(self, name: str) -> FakeBase:
+        assert name == 'mogi_log'
+        return FakeBase(self.documents, self.writes)
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch: pytest.MonkeyPatch) -> FakeDeta:
+    deta = FakeDeta()
+    monkeypatch.setattr(utils, 'deta', deta)
+    return deta
+
+
+def run(test) -> None:
+    async def main() -> None:
+        test()
+        await flushed()
+
+    asyncio.run(main())
+
+
+async def flushed() -> None:
+    await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+
+
+def play() -> tuple[Mogi, list[str]]:
+    """A mogi with a log of every kind of event, and its token after each of them."""
+    mogi = Mogi(tags=['A', 'B'])
+    mogi.open_log()
+    tokens = [mogi.to_token()]
+
+    for i, ranks in enumerate(RACES):
+        mogi.push_race(ranks)
+        tokens.append(mogi.to_token())
+
+        if i == 3:
+            mogi.add_penalty('penalty', 1, -15)
+            tokens.append(mogi.to_token())
+            mogi.set_tag(1, 'Enemy')
+            tokens.append(mogi.to_token())
+
+    mogi.pop_race(2)
+    tokens.append(mogi.to_token())
+    return mogi, tokens
+
+
+def test_replay_matches_live_states() -> None:
+    def test() -> None:
+        mogi, tokens = play()
+
+        assert len(mogi.log.snapshots) > 1
+        assert [m.to_token() for _, m in mogi.log.replay(Mogi)] == tokens
+
+    run(test)
+
+
+@pytest.mark.parametrize('steps', [1, 3, 8, 9, 100])
+def test_undo_matches_replay(steps: int) -> None:
+    def test() -> None:
+        mogi, tokens = play()
+        mogi.undo(steps)
+        head = max(len(tokens) - 1 - steps, 0)
+
+        assert mogi.log.head == head
+        assert mogi.to_token() == tokens[head]
+
+        # Running totals are rebuilt too, not only what the token holds.
+        expected = Mogi()
+        expected.load_token(tokens[head])
+        assert mogi.total == expected.total
+
+    run(test)
+
+
+def test_redo_restores_undone_events() -> None:
+    def test() -> None:
+        mogi, tokens = play()
+        mogi.undo(5)
+        mogi.redo(2)
+        assert mogi.to_token() == tokens[-4]
+
+        mogi.redo(100)
+        assert mogi.to_token() == tokens[-1]
+
+        with pytest.raises(NotRedoable):
+            mogi.redo(1)
+
+    run(test)
+
+
+def test_new_event_drops_redo() -> None:
+    def test() -> None:
+        mogi, tokens = play()
+        mogi.undo(9)
+        mogi.push_race('123456')
+
+        assert not mogi.log.can_redo
+        assert all(k <= mogi.log.head for k in mogi.log.snapshots)
+        assert [m.to_token() for _, m in mogi.log.replay(Mogi)][-1] == mogi.to_token()
+
+    run(test)
+
+
+def test_stored_log_loads_back(store: FakeDeta) -> None:
+    async def main() -> None:
+        mogi, tokens = play()
+        await flushed()
+        mogi.undo(3)
+        await flushed()
+        log = await history.MogiLog.load(mogi.id)
+
+        assert log.events == mogi.log.events
+        assert log.head == mogi.log.head
+        assert log.state_at(log.head, Mogi).to_token() == tokens[-4]
+
+    asyncio.run(main())
+
+
+def test_flush_writes_only_the_tail(store: FakeDeta) -> None:
+    async def main() -> None:
+        mogi, _ = play()
+        await flushed()
+        store.writes.clear()
+
+        mogi.push_race('123456')
+        await flushed()
+        assert store.writes == [f'{mogi.id}:1', mogi.id]
+
+        store.writes.clear()
+        mogi.undo(1)
+        await flushed()
+        assert store.writes == [mogi.id]
+
+        # A new event after undo rewrites the chunk it branched from, and the log is shorter.
+        store.writes.clear()
+        mogi.undo(10)
+        mogi.push_race('123456')
+        await flushed()
+        assert store.writes == [f'{mogi.id}:0', mogi.id]
+        assert (await history.MogiLog.load(mogi.id)).events == mogi.log.events
+
+    asyncio.run(main())
+
+
+def test_partly_expired_log_is_ignored(store: FakeDeta) -> None:
+    async def main() -> None:
+        mogi, _ = play()
+        await flushed()
+        del store.documents[f'{mogi.id}:0']
+
+        assert await history.MogiLog.load(mogi.id) is None
+
+    asyncio.run(main())
+
+
+def test_single_document_log_still_loads(store: FakeDeta) -> None:
+    async def main() -> None:
+        mogi, tokens = play()
+        log = mogi.log
+        store.documents['legacy'] = {'key': 'legacy', 'data': json.dumps({
+            'events': log.events,
+            'snapshots': {str(k): v for k, v in log.snapshots.items()},
+            'head': log.head
+        })}
+        loaded = await history.MogiLog.load('legacy')
+
+        assert loaded.state_at(loaded.head, Mogi).to_token() == tokens[-1]
+
+    asyncio.run(main())
+
+
+def test_mogi_is_cached_only_with_its_log(store: FakeDeta, monkeypatch: pytest.MonkeyPatch) -> None:
+    from datetime import datetime, timezone
+    from types import SimpleNamespace
+
+    from constants import MY_ID
+    from sokuji import components
+
+    mogi = Mogi(tags=['A', 'B'])
+    mogi.push_race('123456')
+    message = SimpleNamespace(
+        embeds=[mogi.embed],
+        author=SimpleNamespace(id=MY_ID),
+        content='',
+        created_at=datetime.now(timezone.utc)
+    )
+
+    class Channel:
+        id = 1
+
+        async def history(self, **kwargs):
+            yield message
+
+    async def unavailable(key: str):
+        raise ConnectionError
+
+    async def main() -> None:
+        with monkeypatch.context() as m:
+            m.setattr(FakeBase, 'get', lambda self, key: unavailable(key))
+
+            with pytest.raises(ConnectionError):
+                await Mogi.get(Channel())
+
+        assert Channel.id not in components._ACTIVE
+
+        loaded = await Mogi.get(Channel())
+        assert loaded.log is not None and components._ACTIVE[Channel.id] is loaded
+        await flushed()
+
+    monkeypatch.setattr(components, '_ACTIVE', components.OrderedDict())
+    monkeypatch.setattr(components, 'BOT_IDS', [MY_ID])
+    asyncio.run(main())
@@ -0,0 +1,191 @@
+import asyncio
+from typing import Any, Optional
+
+import aiohttp
+import pytest
+
+from objects import player
+from objects.player import EmptyPlayer, Player, PlayerCache
+
+
+def data(mmr: int) -> dict[str, Any]:
+    return {
+        'id': 1,
+        'name': 'Player',
+        'mkcId': 10,
+        'discordId': '100',
+        'switchFc': '0000-1111-2222',
+        'isHidden': False,
+        'mmr': mmr,
+        'maxMmr': 9000
+    }
+
+
+class FakeLounge:
+    """Answers the player API from ``responses``: a dict, None for 404 or an HTTP status."""
+
+    def __init__(self, *responses: Any) -> None:
+        self.responses: list[Any] = list(responses)
+        self.calls: int = 0
+
+    async def get(self, url: str, params: dict[str, Any]) -> Optional[dict]:
+        self.calls += 1
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+
+        if isinstance(response, int):
+            raise aiohttp.ClientResponseError(None, (), status=response)
+
+        return response
+
+
+@pytest.fixture
+def cache(monkeypatch: pytest.MonkeyPatch) -> PlayerCache:
+    cache = PlayerCache()
+    monkeypatch.setattr(player, 'PLAYERS', cache)
+    return cache
+
+
+def lounge(monkeypatch: pytest.MonkeyPatch, *responses: Any) -> FakeLounge:
+    fake = FakeLounge(*responses)
+    monkeypatch.setattr(player, 'LOUNGE', fake)
+    return fake
+
+
+def lookup(times: int = 1) -> list[Any]:
+    async def main() -> list[Any]:
+        players = [await player.get_player(name='Player') for _ in range(times)]
+        # Lets background revalidation finish.
+        await asyncio.gather(*(asyncio.all_tasks() - {asyncio.current_task()}))
+        return players
+
+    return asyncio.run(main())
+
+
+def test_not_found_is_cached(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, None)
+
+    assert all(p.is_empty for p in lookup(3))
+    assert fake.calls == 1
+
+    cached, fresh = cache.get(('name', 'player'))
+    assert isinstance(cached, EmptyPlayer) and fresh
+
+
+def test_negative_entry_expires(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    cache.negative_ttl = 0
+    fake = lounge(monkeypatch, None, data(5000))
+
+    assert lookup()[0].is_empty
+    assert lookup()[0].mmr == 5000
+    assert fake.calls == 2
+
+
+def test_errors_are_not_cached(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, 429, 500, data(5000))
+
+    assert lookup()[0].is_empty
+    assert lookup()[0].is_empty
+    assert cache.get(('name', 'player')) is None
+    assert lookup()[0].mmr == 5000
+    assert fake.calls == 3
+
+
+def test_found_player_is_cached_under_every_key(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, data(5000))
+    lookup(2)
+
+    assert fake.calls == 1
+
+    for key in (('name', 'player'), ('mkcId', '10'), ('discordId', '100'), ('fc', '0000-1111-2222')):
+        cached, fresh = cache.get(key)
+        assert isinstance(cached, Player) and cached.mmr == 5000 and fresh
+
+
+def test_query_key_is_cached_as_asked(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, data(5000))
+
+    async def main() -> list[Any]:
+        return [await player.get_player(switch_fc='000011112222') for _ in range(3)]
+
+    assert [p.mmr for p in asyncio.run(main())] == [5000] * 3
+    assert fake.calls == 1
+    assert cache.get(('fc', '0000-1111-2222'))[0].mmr == 5000
+
+
+def test_stale_entry_is_served_and_revalidated(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    cache.ttl = 0
+    fake = lounge(monkeypatch, data(5000), data(6000))
+
+    assert lookup()[0].mmr == 5000
+    # Served from the cache while a background request refreshes it.
+    assert lookup()[0].mmr == 5000
+    assert fake.calls == 2
+    assert cache.get(('name', 'player'))[0].mmr == 6000
+
+
+def test_failed_revalidation_keeps_stale_entry(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    cache.ttl = 0
+    fake = lounge(monkeypatch, data(5000), 503)
+
+    lookup()
+    assert lookup()[0].mmr == 5000
+    assert fake.calls == 2
+
+    cached, fresh = cache.get(('name', 'player'))
+    assert cached.mmr == 5000 and not fresh
+
+
+def test_stale_limit(cache: PlayerCache) -> None:
+    cache.stale = 0
+    cache.put(('name', 'player'), Player.loads(data(5000)))
+
+    assert cache.get(('name', 'player')) is None
+
+
+def test_concurrent_lookups_share_one_request(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, data(5000))
+
+    async def main() -> list[Any]:
+        get = fake.get
+        release = asyncio.Event()
+
+        async def slow_get(url: str, params: dict[str, Any]) -> Optional[dict]:
+            await release.wait()
+            return await get(url, params)
+
+        monkeypatch.setattr(fake, 'get', slow_get)
+        lookups = [asyncio.create_task(player.get_player(name=name)) for name in ('Player', 'player', 'PLAYER')]
+        await asyncio.sleep(0)
+        release.set()
+        return await asyncio.gather(*lookups)
+
+    players = asyncio.run(main())
+
+    assert fake.calls == 1
+    assert [p.mmr for p in players] == [5000] * 3
+    # Each caller gets a copy of its own.
+    assert len({id(p) for p in players}) == 3
+    assert not player._INFLIGHT
+
+
+def test_cancelled_caller_does_not_cancel_the_others(monkeypatch: pytest.MonkeyPatch, cache: PlayerCache) -> None:
+    fake = lounge(monkeypatch, data(5000))
+
+    async def main() -> Any:
+        get = fake.get
+        release = asyncio.Event()
+
+        async def slow_get(url: str, params: dict[str, Any]) -> Optional[dict]:
+            await release.wait()
+            return await get(url, params)
+
+        monkeypatch.setattr(fake, 'get', slow_get)
+        first = asyncio.create_task(player.get_player(name='Player'))
+        second = asyncio.create_task(player.get_player(name='Player'))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+        return await second
+
+    assert asyncio.run(main()).mmr == 5000
+    assert fake.calls == 1
@@ -0,0 +1,13 @@
+from benchmarks.rank_parser import corpus, legacy_parse, parse
+
+
+def test_from_text_matches_legacy_parser() -> None:
+    mismatches = [t for t in corpus(4) if parse(t) != legacy_parse(t)]
+    assert not mismatches, mismatches[:10]
+
+
+def test_from_text_examples() -> None:
+    assert parse('123456') == [1, 2, 3, 4, 5, 6]
+    assert parse('1-4+') == [1, 2, 3, 4, 11]
+    assert parse('-3') == [1, 2, 3]
+    assert parse('0+12') == [10, 11, 12]
@@ -0,0 +1,69 @@
+from sokuji.components import Mogi
+from objects import Format
+
+
+def make_mogi() -> Mogi:
+    mogi = Mogi(tags=['Team A', '敵チーム'], banner_users={'alice', 'bob'}, is_ja=False)
+
+    for ranks in ('123456', '1-4+', '-3 12', '0+12'):
+        mogi.push_race(ranks)
+
+    mogi.add_penalty('penalty', 1, -15)
+    mogi.add_penalty('repick', 0, -15)
+    mogi.add_mirror(123)
+    mogi.add_mirror(456)
+    mogi.mirror_messages[456] = 789
+    return mogi
+
+
+def test_round_trip() -> None:
+    mogi = make_mogi()
+    loaded = Mogi()
+
+    assert loaded.load_token(mogi.to_token())
+    assert loaded.to_token() == mogi.to_token()
+    assert loaded.id == mogi.id
+    assert loaded.tags == mogi.tags
+    assert loaded.total == mogi.total
+    assert [r.scores for r in loaded.races] == [r.scores for r in mogi.races]
+    assert loaded.penalty == [0, -15] and loaded.repick == [-15, 0]
+    assert loaded.banner_users == {'alice', 'bob'}
+    assert loaded.is_ja is False
+    assert loaded.mirrors == [123, 456]
+    assert loaded.mirror_messages == {456: 789}
+
+
+def test_round_trip_team_format() -> None:
+    mogi = Mogi(tags=['A', 'B', 'C', 'D'], format=Format.V3)
+    mogi.push_race('123 456 789')
+    loaded = Mogi()
+
+    assert loaded.load_token(mogi.to_token())
+    assert loaded.format is Format.V3
+    assert loaded.total == mogi.total == [37, 24, 15, 6]
+
+
+def test_mirror_token_carries_no_mirrors() -> None:
+    loaded = Mogi()
+
+    assert loaded.load_token(make_mogi().to_token(is_mirror=True))
+    assert loaded.is_mirror
+    assert loaded.mirrors == [] and loaded.mirror_messages == {}
+
+
+def test_plain_mirror_ids_still_load() -> None:
+    mogi = make_mogi()
+    mogi.mirror_messages.clear()
+    loaded = Mogi()
+
+    assert loaded.load_token(mogi.to_token())
+    assert loaded.mirrors == [123, 456]
+    assert loaded.mirror_messages == {}
+
+
+def test_invalid_token() -> None:
+    mogi = Mogi()
+
+    assert not mogi.load_token('not a token')
+    assert not mogi.load_token(make_mogi().to_token()[:-8])
+    assert not mogi.load_token(None)
@@ -12,7 +12,7 @@ from discord import (
     ApplicationContext
 )
 from common import MyEmbed, LoungeEmbed, get_team_name, set_lounge_id, maybe_param
-from objects import get_players_by_ids, get_players_by_fc_string, from_records, get_player
+from objects import get_players_by_ids, get_players_by_fc_string, from_records, get_player, LEADERBOARD, Distribution
 from team.errors import PlayerNotFound, TooManyPlayers
 from constants import SUPPORT_ID
 
@@ -79,15 +79,17 @@ async def fm(
     e = LoungeEmbed(mmr=average, title=f'Average MMR: {average:.1f}')
     description = ''
     count = 0
+    positions = LEADERBOARD.mmr.position(df['mmr'].to_numpy(dtype=float))
 
-    for player in from_records(df.to_dict('records')):
+    for player, position in zip(from_records(df.to_dict('records')), positions):
         if not player.is_empty:
             count += 1
-            description += f'{str(count).rjust(3)}: [{player.name}]({player.mkc_url})' + (f'  ({int(player.mmr)})\n' if player.mmr is not None else '\n')
+            description += f'{str(count).rjust(3)}: [{player.name}]({player.mkc_url})' + (f'  ({Distribution.with_position(player.mmr, position)})\n' if player.mmr is not None else '\n')
         else:
             description += f'N/A ({player.switch_fc})\n'
 
-    description += f'\n**Rank**  {e.rank}'
+    description += f'\n**Rank**  {e.rank}\n' + LEADERBOARD.mmr.top_line(average)
+
     e.description = description
 
     if isinstance(ctx, commands.Context):
@@ -125,15 +127,17 @@ async def peak(
     e = LoungeEmbed(mmr=average, title=f'Average MMR: {average:.1f}')
     description = ''
     count = 0
+    positions = LEADERBOARD.max_mmr.position(df['max_mmr'].to_numpy(dtype=float))
 
-    for player in from_records(df.to_dict('records')):
+    for player, position in zip(from_records(df.to_dict('records')), positions):
         if not player.is_empty:
             count += 1
-            description += f'{str(count).rjust(3)}: [{player.name}]({player.mkc_url})' + (f'  ({int(player.max_mmr)})\n' if player.max_mmr is not None else '\n')
+            description += f'{str(count).rjust(3)}: [{player.name}]({player.mkc_url})' + (f'  ({Distribution.with_position(player.max_mmr, position)})\n' if player.max_mmr is not None else '\n')
         else:
             description += f'N/A ({player.switch_fc})\n'
 
-    description += f'\n**Rank**  {e.rank}'
+    description += f'\n**Rank**  {e.rank}\n' + LEADERBOARD.max_mmr.top_line(average)
+
     e.description = description
 
     if isinstance(ctx, commands.Context):